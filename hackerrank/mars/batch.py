@@ -0,0 +1,205 @@
+"""Solve many chunk files in one process pool
+
+Every file named on the command line, every file matching a glob, and every
+file matching --pattern inside a directory is solved with optimal_time.
+The interpreter and imports are paid for once per worker rather than once
+per file.
+
+Usage:
+    python batch.py 'telemetry/*.txt' -j 8 --output results.csv
+    python batch.py telemetry/ --pattern 'input*.txt' --unordered
+
+"""
+
+import csv
+import fnmatch
+import glob
+import json
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+from collections import namedtuple
+from StringIO import StringIO
+
+import hackerrank_practice as hp
+
+#-------------------------------------------------------------------------------
+
+FileResult = namedtuple('FileResult', 'path best_time seconds error')
+
+#-------------------------------------------------------------------------------
+
+def find_files(paths, pattern='*.txt'):
+    """Expand directories and globs into a sorted list of files.
+
+    Parameters:
+    -----------
+    paths : list of str
+        files, directories or glob patterns
+    pattern : str
+        file name pattern used inside directories
+
+    Returns:
+    --------
+    files : list of str
+        every matching file, without duplicates
+
+    """
+
+    files = set()
+    for path in paths:
+        if os.path.isdir(path):
+            files.update(os.path.join(path, name)
+                         for name in fnmatch.filter(os.listdir(path), pattern)
+                         if os.path.isfile(os.path.join(path, name)))
+        else:
+            files.update(name for name in glob.glob(path)
+                         if os.path.isfile(name))
+
+    return sorted(files)
+
+#-------------------------------------------------------------------------------
+
+def solve_file(path, engine='ucs'):
+    """Run optimal_time on one file, recording time taken and any failure.
+
+    Anything optimal_time prints, such as malformed lines or missing bytes,
+    is captured rather than interleaved with the other workers.
+
+    Returns:
+    --------
+    result : FileResult
+        path, best time (None on failure), seconds taken and the error text
+        (None on success)
+
+    """
+
+    stdout, stderr = sys.stdout, sys.stderr
+    sys.stdout = sys.stderr = messages = StringIO()
+
+    start = time.time()
+    try:
+        with open(path) as chunk_file:
+            best_time = hp.optimal_time(chunk_file.read(), engine)
+        error = None
+    except Exception:
+        best_time = None
+        error = traceback.format_exc().strip().splitlines()[-1]
+    finally:
+        sys.stdout, sys.stderr = stdout, stderr
+    seconds = time.time() - start
+
+    if error is None and best_time is None:
+        error = messages.getvalue().strip() or 'no solution'
+
+    return FileResult(path, best_time, seconds, error)
+
+def _solve_file(args):
+    """solve_file for Pool.imap, which passes a single argument."""
+
+    return solve_file(*args)
+
+#-------------------------------------------------------------------------------
+
+def solve_files(files, workers=None, ordered=True, engine='ucs', chunksize=1):
+    """Solve every file in a process pool.
+
+    Parameters:
+    -----------
+    files : list of str
+        chunk files to solve
+    workers : int, None
+        number of worker processes, defaults to the number of CPUs
+    ordered : bool
+        yield results in the order of files rather than as they finish
+    engine : str
+        engine passed on to optimal_time
+    chunksize : int
+        files handed to a worker at a time
+
+    Returns:
+    --------
+    results : generator
+        a FileResult for every file
+
+    """
+
+    tasks = [(path, engine) for path in files]
+
+    if workers == 1 or len(tasks) < 2:
+        for task in tasks:
+            yield _solve_file(task)
+        return
+
+    pool = multiprocessing.Pool(workers)
+    try:
+        imap = pool.imap if ordered else pool.imap_unordered
+        for result in imap(_solve_file, tasks, chunksize):
+            yield result
+    finally:
+        pool.terminate()
+        pool.join()
+
+#-------------------------------------------------------------------------------
+
+def write_results(results, path):
+    """Write FileResults as JSON if path ends in .json, otherwise as CSV."""
+
+    if path.endswith('.json'):
+        with open(path, 'w') as out:
+            json.dump([result._asdict() for result in results], out, indent=2)
+        return
+
+    with open(path, 'wb') as out:
+        writer = csv.writer(out)
+        writer.writerow(FileResult._fields)
+        writer.writerows(results)
+
+#-------------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('paths', nargs='+',
+                        help='chunk files, directories or glob patterns')
+    parser.add_argument('--pattern', default='*.txt',
+                        help='file name pattern used inside directories')
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help='number of worker processes')
+    parser.add_argument('--unordered', action='store_true',
+                        help='print results as they finish')
+    parser.add_argument('--engine', choices=['ucs', 'dp'], default='ucs')
+    parser.add_argument('--chunksize', type=int, default=1,
+                        help='files handed to a worker at a time')
+    parser.add_argument('--output', default=None,
+                        help='write results to a .csv or .json file')
+    args = parser.parse_args()
+
+    files = find_files(args.paths, args.pattern)
+    if not files:
+        parser.error('no files found')
+
+    results = []
+    start = time.time()
+    for result in solve_files(files, args.workers, not args.unordered,
+                              args.engine, args.chunksize):
+        results.append(result)
+
+        if result.error is None:
+            print "{}: {:.3f} ({:.3f} s)".format(result.path, result.best_time,
+                                                 result.seconds)
+        else:
+            print "{}: FAILED {} ({:.3f} s)".format(result.path, result.error,
+                                                    result.seconds)
+
+    failed = sum(result.error is not None for result in results)
+    print "{} files, {} failed, {:.3f} s".format(len(results), failed,
+                                                 time.time() - start)
+
+    if args.output:
+        write_results(results, args.output)
+
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,279 @@
+"""Fetch a downlink plan from a local stand-in chunk server
+
+The server holds an image and answers "start,stop" requests with those
+bytes, waiting out the round-trip latency and then pacing the reply at the
+configured bandwidth, so fetching a chunk takes read_time just like the
+model in hackerrank_practice.  time_scale shrinks every wait so that long
+simulated sessions can run in seconds.
+
+Each link is one connection that fetches its chunks one after another, and
+the links run concurrently.  Replies are received straight into one
+preallocated buffer through a memoryview, so the image is reassembled
+without copying.
+
+Usage:
+    python downlink.py -k 2 --time-scale 0.01 < input000.txt
+
+"""
+
+import os
+import socket
+import sys
+import threading
+import time
+from collections import namedtuple
+from SocketServer import StreamRequestHandler, ThreadingTCPServer
+
+import hackerrank_practice as hp
+import multilink
+
+#-------------------------------------------------------------------------------
+
+ChunkTiming = namedtuple('ChunkTiming', 'link chunk measured predicted')
+DownlinkResult = namedtuple('DownlinkResult', 'image link_times '
+                                              'predicted_link_times timings')
+
+#-------------------------------------------------------------------------------
+
+class _ChunkHandler(StreamRequestHandler):
+    """Serve "start,stop" requests on one connection until it closes."""
+
+    block_size = 4096
+
+    def setup(self):
+        StreamRequestHandler.setup(self)
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def handle(self):
+        server = self.server
+        rate = server.bandwidth / server.time_scale
+
+        for line in iter(self.rfile.readline, ''):
+            start, stop = hp.parse_line(line)
+
+            time.sleep(2.0 * server.latency * server.time_scale)
+
+            data = memoryview(server.image)[start:stop]
+            began = time.time()
+            for sent in xrange(0, len(data), self.block_size):
+                block = data[sent:sent + self.block_size]
+
+                #-- hold each block back until it would have fully arrived
+                ahead = (sent + len(block)) / rate - (time.time() - began)
+                if ahead > 0:
+                    time.sleep(ahead)
+
+                self.request.sendall(block)
+
+#-------------------------------------------------------------------------------
+
+class ChunkServer(ThreadingTCPServer):
+    """Stand-in chunk server on localhost, running in a background thread.
+
+    Parameters:
+    -----------
+    image : str, bytearray
+        the full image to serve
+    latency : float, int
+        Latency of the connection in seconds.
+    bandwidth : float, int
+        Bandiwidth of the connection in bytes per second.
+    time_scale : float
+        factor applied to every simulated wait
+
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, image, latency, bandwidth, time_scale=1.0):
+        ThreadingTCPServer.__init__(self, ('127.0.0.1', 0), _ChunkHandler)
+
+        self.image = image
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.time_scale = time_scale
+
+        self._thread = threading.Thread(target=self.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def close(self):
+        self.shutdown()
+        self.server_close()
+
+#-------------------------------------------------------------------------------
+
+def _fetch_link(address, chunks, view, link, timings, link_times, errors,
+                began):
+    """Fetch chunks in order over one connection into view.
+
+    The time from began until the last chunk arrives is stored in
+    link_times[link].  Any exception is stored in errors[link], as returned
+    by sys.exc_info, for fetch_links to raise once every link is done.
+
+    """
+
+    try:
+        connection = socket.create_connection(address)
+        try:
+            connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            for start, stop in chunks:
+                chunk_began = time.time()
+                connection.sendall('{},{}\n'.format(start, stop))
+
+                received = start
+                while received < stop:
+                    n_bytes = connection.recv_into(view[received:stop])
+                    if not n_bytes:
+                        raise IOError("connection closed during chunk "
+                                      "{}".format((start, stop)))
+                    received += n_bytes
+
+                timings.append((link, (start, stop),
+                                time.time() - chunk_began))
+
+            link_times[link] = time.time() - began
+        finally:
+            connection.close()
+    except Exception:
+        errors[link] = sys.exc_info()
+
+#-------------------------------------------------------------------------------
+
+def fetch_links(address, links, total_bytes, latency, bandwidth,
+                time_scale=1.0):
+    """Fetch every link's chunks concurrently and reassemble the image.
+
+    Parameters:
+    -----------
+    address : tuple
+        (host, port) of the chunk server
+    links : list of lists
+        chunks to fetch on each link, in order
+    total_bytes : int
+        bytes in the image
+    latency, bandwidth : float, int
+        the connection model used for the predicted times
+    time_scale : float
+        factor the server applies to its waits, applied to predictions too
+
+    Returns:
+    --------
+    result : DownlinkResult
+        the reassembled image, measured and predicted busy time of each
+        link, and a ChunkTiming for every chunk
+
+    Raises:
+    -------
+    the first exception from any link, such as socket.error for a refused
+    connection or IOError for a connection closed mid chunk
+
+    """
+
+    image = bytearray(total_bytes)
+    view = memoryview(image)
+
+    timings = []
+    link_times = [0.0] * len(links)
+    errors = [None] * len(links)
+    began = time.time()
+    threads = [threading.Thread(target=_fetch_link,
+                                args=(address, chunks, view, link, timings,
+                                      link_times, errors, began))
+               for link, chunks in enumerate(links)]
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    #-- raise the first failure with its original traceback
+    for error in errors:
+        if error is not None:
+            raise error[0], error[1], error[2]
+
+    def predicted(chunk):
+        size = chunk[1] - chunk[0]
+        return hp.read_time(size, bandwidth, latency) * time_scale
+
+    predicted_link_times = [sum(predicted(chunk) for chunk in chunks)
+                            for chunks in links]
+
+    chunk_timings = [ChunkTiming(link, chunk, measured, predicted(chunk))
+                     for link, chunk, measured in timings]
+
+    return DownlinkResult(image, link_times, predicted_link_times,
+                          chunk_timings)
+
+#-------------------------------------------------------------------------------
+
+def run_downlink(input_string, n_links=1, time_scale=1.0, image=None):
+    """Plan a downlink, fetch it from a local server and check the image.
+
+    Parameters:
+    -----------
+    input_string : str
+        data in the format read by optimal_time
+    n_links : int
+        number of concurrent links, scheduled with multilink
+    time_scale : float
+        factor applied to every simulated wait
+    image : str, None
+        image for the server to hold, random bytes by default
+
+    Returns:
+    --------
+    result : DownlinkResult, None
+        see fetch_links, or None if the chunks cannot cover the image
+
+    Raises:
+    -------
+    IOError if the reassembled image does not match the served one
+
+    """
+
+    total_bytes, latency, bandwidth = map(int, input_string.split('\n', 3)[:3])
+
+    schedule = multilink.optimal_parallel_time(input_string, n_links)
+    if schedule is None:
+        return None
+
+    if image is None:
+        image = os.urandom(total_bytes)
+
+    server = ChunkServer(image, latency, bandwidth, time_scale)
+    try:
+        result = fetch_links(server.server_address, schedule.links,
+                             total_bytes, latency, bandwidth, time_scale)
+    finally:
+        server.close()
+
+    if result.image != image:
+        raise IOError("reassembled image does not match the served image")
+
+    return result
+
+#-------------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-k', '--links', type=int, default=1,
+                        help='number of concurrent links')
+    parser.add_argument('--time-scale', type=float, default=1.0,
+                        help='factor applied to every simulated wait')
+    args = parser.parse_args()
+
+    result = run_downlink(sys.stdin.read(), args.links, args.time_scale)
+
+    if result:
+        for timing in sorted(result.timings):
+            print "link {} {}: {:.3f} s (predicted {:.3f} s)".format(*timing)
+        for link, (measured, predicted) in enumerate(zip(
+                result.link_times, result.predicted_link_times)):
+            print "link {}: {:.3f} s (predicted {:.3f} s)".format(
+                link, measured, predicted)
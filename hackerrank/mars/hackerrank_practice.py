@@ -1,6 +1,12 @@
 import sys
 import heapq as hq
+from bisect import bisect_left, bisect_right
 from collections import namedtuple
+from itertools import groupby
+from operator import itemgetter
+from StringIO import StringIO
+
+import numpy as np
 
 #-------------------------------------------------------------------------------
 
@@ -13,8 +19,8 @@ def byte_check(ref_bytes, chunks):
 
     Parameters:
     -----------
-    ref_bytes : int
-        bytes in the original data.
+    ref_bytes : int, iterable
+        bytes in the original data, or a collection of every byte index.
     chunks : list of tuples
         list of (start, stop) bytes as output by parse_input
 
@@ -25,21 +31,67 @@ def byte_check(ref_bytes, chunks):
 
     """
 
-    if not len(chunks):
-        return False
+    if not np.isscalar(ref_bytes):
+        ref_bytes = len(ref_bytes)
 
-    chunks = sorted(chunks)
+    chunks = np.array(list(chunks), dtype=np.int64).reshape(-1, 2)
+    covered, _ = check_coverage(ref_bytes, chunks[:, 0], chunks[:, 1])
 
-    byte_min, byte_max = chunks[0]
+    return covered
 
-    for start, stop in chunks[1:]:
-        if (start >= byte_min) and (start <= byte_max) and (stop > byte_max):
-            byte_max = stop
+#-------------------------------------------------------------------------------
 
-    if (byte_min, byte_max) == (0, ref_bytes):
-        return True
-    else:
-        return False
+def check_coverage(ref_bytes, starts, stops):
+    """Find every range of bytes from 0 to ref_bytes that no chunk covers.
+
+    Chunks that run past ref_bytes are ignored, as no download path can
+    end with them.  The chunks are sorted by start and a running maximum of
+    their stops gives the furthest byte covered so far, and there is a gap
+    wherever the next start lies beyond it.
+
+    Parameters:
+    -----------
+    ref_bytes : int
+        bytes in the original data.
+    starts : np.ndarray
+        start byte of each chunk
+    stops : np.ndarray
+        stop byte of each chunk
+
+    Returns:
+    --------
+    covered : bool
+        Whether or not the data can be recovered
+    gaps : list of tuples
+        (start, stop) of each uncovered byte range, in order
+
+    """
+
+    starts = np.asarray(starts, dtype=np.int64)
+    stops = np.asarray(stops, dtype=np.int64)
+
+    usable = stops <= ref_bytes
+    starts = starts[usable]
+    stops = stops[usable]
+
+    if not len(starts):
+        gaps = [(0, ref_bytes)] if ref_bytes > 0 else []
+        return not gaps, gaps
+
+    #-- the order of chunks with equal starts does not affect the gaps
+    order = np.argsort(starts)
+    starts = starts[order]
+    reach = np.maximum.accumulate(stops[order])
+
+    #-- covered up to reach[i - 1] when chunk i starts
+    edges = np.concatenate(([0], reach[:-1]))
+    missing = np.flatnonzero(starts > edges)
+    gaps = zip(edges[missing].tolist(), starts[missing].tolist())
+
+    if reach[-1] < ref_bytes:
+        gaps.append((int(reach[-1]), ref_bytes))
+
+    return not gaps, gaps
 
 #-------------------------------------------------------------------------------
 
@@ -67,7 +119,7 @@ def get_leafs(start_node, all_nodes):
 
 #-------------------------------------------------------------------------------
 
-def optimal_time(input_string):
+def optimal_time(input_string, engine='ucs', return_plan=False):
     """Find the best-case downlink time from the available data-chunks.
 
     Assumed formatting of input_string:
@@ -84,22 +136,43 @@ def optimal_time(input_string):
     -----------
     input_string, str
         string containing the formatted input data
+    engine : str
+        'ucs' for uniform_cost_search or 'dp' for sweep_line_search
+    return_plan : bool
+        also return the chunks to request
 
     Returns:
     --------
     best_time : float
         the smallest amount of time to read the data for the entire image
+    plan : list of tuples, None
+        only if return_plan is set, the chunks to request in byte order
 
     """
 
-    total_bytes, data = parse_input(input_string)
+    engines = {'ucs': uniform_cost_search,
+               'dp': sweep_line_search}
 
-    if not byte_check(total_bytes, data):
-        return None
+    if not engine in engines:
+        raise ValueError("engine must be one of {}".format(sorted(engines)))
+
+    #-- check coverage on the parsed arrays, before building the search
+    data = parse_stream(StringIO(input_string))
+    _print_errors(data)
 
-    best_time = uniform_cost_search(data, total_bytes)
+    covered, gaps = check_coverage(data.total_bytes, data.starts, data.stops)
+    if not covered:
+        print >> sys.stderr, 'cannot recover image, bytes missing: {}'.format(
+            ', '.join('{}-{}'.format(start, stop) for start, stop in gaps))
+        return (None, None) if return_plan else None
 
-    return best_time
+    #-- the search index sorts the parsed arrays directly, skipping the dict
+    if engine == 'ucs':
+        cost_data = ChunkIndex.from_arrays(data.starts, data.stops, data.costs)
+    else:
+        cost_data = _chunk_costs(data)
+
+    return engines[engine](cost_data, data.total_bytes, return_plan)
 
 #-------------------------------------------------------------------------------
 
@@ -130,23 +203,159 @@ def parse_input(input_string):
 
     """
 
-    all_lines = input_string.splitlines()
+    data = parse_stream(StringIO(input_string))
+    _print_errors(data)
+
+    return data.total_bytes, _chunk_costs(data)
+
+def _print_errors(data):
+    """Print the malformed lines found by parse_stream."""
+
+    for error in data.errors:
+        print 'line {} error: {}'.format(error.line_number, error.reason)
+
+def _chunk_costs(data):
+    """Dictionary of (start, stop), read time pairs from parse_stream data."""
+
+    return dict(zip(zip(data.starts.tolist(), data.stops.tolist()),
+                    data.costs.tolist()))
+
+#-------------------------------------------------------------------------------
+
+ChunkData = namedtuple('ChunkData', 'total_bytes latency bandwidth '
+                                    'starts stops costs errors')
+LineError = namedtuple('LineError', 'line_number text reason')
+
+def _clean_lines(text):
+    """Count the lines in text if every one is a well formed chunk line.
+
+    A well formed line is two optionally signed integers separated by one
+    comma, with only spaces or tabs around them.  The check runs over the
+    raw bytes with numpy, so a block of lines is validated without a Python
+    loop.
+
+    Returns:
+    --------
+    n_lines : int, None
+        number of lines, or None if any line needs checking by parse_line
+
+    """
+
+    raw = np.frombuffer(text, dtype=np.uint8)
+
+    newline = raw == ord('\n')
+    digit = (raw >= ord('0')) & (raw <= ord('9'))
+    sign = (raw == ord('+')) | (raw == ord('-'))
+    comma = raw == ord(',')
+    space = (raw == ord(' ')) | (raw == ord('\t')) | (raw == ord('\r'))
+
+    if not (newline | digit | sign | comma | space).all():
+        return None
+
+    n_lines = int(newline.sum()) + int(not newline[-1])
+    line = np.cumsum(newline) - newline
+
+    #-- exactly one comma on each line
+    if not (np.bincount(line[comma], minlength=n_lines) == 1).all():
+        return None
+
+    #-- signs only at the start of a number
+    number = digit | sign
+    number_start = number & ~np.concatenate(([False], number[:-1]))
+    before_digit = np.concatenate((digit[1:], [False]))
+    if (sign & ~(number_start & before_digit)).any():
+        return None
+
+    #-- exactly one number on each side of the comma
+    side = np.cumsum(comma) - line
+    field = 2 * line[number_start] + side[number_start]
+    if not (np.bincount(field, minlength=2 * n_lines) == 1).all():
+        return None
 
-    total_bytes = int(all_lines[0])
-    latency = int(all_lines[1])
-    bandwidth = int(all_lines[2])
-    n_chunks = int(all_lines[3])
+    return n_lines
 
-    all_chunks = {}
-    for i, line in enumerate(all_lines[4:]):
-        try:
-            data = parse_line(line)
-        except Exception as e:
-            print 'line {} error: {}'.format(i, e)
+#-------------------------------------------------------------------------------
 
-        all_chunks[data] = read_time(data[1] - data[0], bandwidth, latency)
+def parse_stream(source, block_bytes=2 ** 22):
+    """Parse telemetry data from a file object or mmap into numpy arrays.
 
-    return total_bytes, all_chunks
+    The input has the same layout as for parse_input.  Chunk lines are read
+    about block_bytes at a time, and a block where every line is well formed
+    is converted in one numpy call.  Only blocks that contain a bad line
+    fall back to parse_line, and bad lines are reported in errors rather
+    than printed.
+
+    Parameters:
+    -----------
+    source : file, mmap
+        anything with readline and read methods
+    block_bytes : int
+        number of bytes converted together
+
+    Returns:
+    --------
+    data : ChunkData
+        total_bytes, latency and bandwidth from the header, starts, stops
+        and costs arrays of the valid chunks in input order, and errors, a
+        list of LineError(line_number, text, reason) for each bad line
+
+    """
+
+    header = [source.readline() for _ in xrange(4)]
+    if not header[-1]:
+        raise ValueError("Input needs 4 header lines")
+
+    total_bytes = int(header[0])
+    latency = int(header[1])
+    bandwidth = int(header[2])
+
+    starts = []
+    stops = []
+    errors = []
+
+    line_number = len(header)
+    remainder = ''
+    while True:
+        new_data = source.read(block_bytes)
+
+        #-- only whole lines are parsed until the end of the input
+        text = remainder + new_data
+        if new_data:
+            cut = text.rfind('\n') + 1
+            text, remainder = text[:cut], text[cut:]
+
+        if text:
+            n_lines = _clean_lines(text)
+            if n_lines is not None:
+                values = np.fromstring(text.replace(',', ' '),
+                                       dtype=np.int64, sep=' ')
+            else:
+                lines = text.split('\n')
+                if text.endswith('\n'):
+                    lines.pop()
+
+                n_lines = len(lines)
+                values = []
+                for i, line in enumerate(lines, line_number + 1):
+                    try:
+                        values.append(parse_line(line))
+                    except ValueError as e:
+                        errors.append(LineError(i, line.rstrip('\r'), str(e)))
+
+            values = np.array(values, dtype=np.int64).reshape(-1, 2)
+            starts.append(values[:, 0])
+            stops.append(values[:, 1])
+            line_number += n_lines
+
+        if not new_data:
+            break
+
+    starts = np.concatenate(starts) if starts else np.zeros(0, dtype=np.int64)
+    stops = np.concatenate(stops) if stops else np.zeros(0, dtype=np.int64)
+    costs = read_time(stops - starts, bandwidth, latency)
+
+    return ChunkData(total_bytes, latency, bandwidth,
+                     starts, stops, costs, errors)
 
 #-------------------------------------------------------------------------------
 
@@ -198,8 +407,8 @@ def read_time(size, bandwidth, latency):
 
     Parameters:
     -----------
-    size : float, int
-        Total size of the data chunk in bytes
+    size : float, int, np.ndarray
+        Total size of the data chunk in bytes, or an array of sizes
     bandwidth : float, int
         Bandiwidth of the connection in bytes per second.
     latency : float, int
@@ -207,70 +416,520 @@ def read_time(size, bandwidth, latency):
 
     Returns:
     --------
-    total_time : float
+    total_time : float, np.ndarray
         time to downlink in seconds.
 
     """
 
-    return 2.0 * latency + (float(size) / bandwidth)
+    #-- multiplying by 1.0 avoids integer division for ints and int arrays
+    return 2.0 * latency + (size * 1.0 / bandwidth)
 
 #-------------------------------------------------------------------------------
 
-def uniform_cost_search(cost_data, nbytes):
-    """Perform uniform cost search analysis on input collection of nodes.
+class ChunkIndex(object):
+    """Chunks sorted by start byte, with removal.
 
+    Removed positions are skipped with path-compressed "next live" pointers,
+    so a range query only ever visits chunks that are still present, and a
+    full search visits every chunk a single time.
 
     Parameters:
     -----------
     cost_data : dict
-        dictionary of node, cost pairs
+        dictionary of (start, stop), cost pairs.  See from_arrays to build
+        the index straight from parse_stream arrays.
+
+    """
+
+    def __init__(self, cost_data):
+        chunks = list(cost_data)
+        self._load(np.array([start for start, _ in chunks], dtype=np.int64),
+                   np.array([stop for _, stop in chunks], dtype=np.int64),
+                   np.array([cost_data[chunk] for chunk in chunks]))
+
+    @classmethod
+    def from_arrays(cls, starts, stops, costs):
+        """Build the index from matching start, stop and cost arrays.
+
+        Repeated chunks are kept once, as they would be in a dict.
+
+        """
+
+        index = cls.__new__(cls)
+        index._load(np.asarray(starts), np.asarray(stops), np.asarray(costs))
+
+        return index
+
+    def _load(self, starts, stops, costs):
+        #-- sorting start * span + stop in one argsort is several times
+        #-- faster than lexsort, whenever the key fits in an int64
+        span = int(stops.max()) + 1 if len(stops) else 1
+        if (len(starts) and min(starts.min(), stops.min()) >= 0 and
+                (int(starts.max()) + 1) * span < 2 ** 63):
+            order = np.argsort(starts.astype(np.int64) * span + stops)
+        else:
+            order = np.lexsort((stops, starts))
+
+        starts, stops, costs = starts[order], stops[order], costs[order]
+
+        unique = np.ones(len(order), dtype=bool)
+        unique[1:] = (starts[1:] != starts[:-1]) | (stops[1:] != stops[:-1])
+
+        self.starts = starts[unique].tolist()
+        self.chunks = zip(self.starts, stops[unique].tolist())
+        self.costs = costs[unique].tolist()
+
+        #-- next_live[i] leads to the first live position >= i
+        self.next_live = range(len(self.chunks) + 1)
+
+    def _find(self, i):
+        next_live = self.next_live
+
+        root = i
+        while next_live[root] != root:
+            root = next_live[root]
+
+        while next_live[i] != root:
+            next_live[i], i = root, next_live[i]
+
+        return root
+
+    def remove(self, i):
+        """Remove the chunk at sorted position i from future queries."""
+
+        self.next_live[i] = i + 1
+
+    def pop_range(self, low, high):
+        """Remove and return every live chunk with low <= start <= high.
+
+        Returns:
+        --------
+        positions : list
+            sorted positions of the removed chunks, see self.chunks
+
+        """
+
+        next_live = self.next_live
+        end = bisect_right(self.starts, high)
+
+        found = []
+
+        i = self._find(bisect_left(self.starts, low))
+        while i < end:
+            found.append(i)
+            next_live[i] = i + 1
+            i = self._find(i + 1)
+
+        return found
+
+#-------------------------------------------------------------------------------
+
+def uniform_cost_search(cost_data, nbytes, return_plan=False):
+    """Perform uniform cost search analysis on input collection of nodes.
+
+    The search starts from a zero-cost origin node at (0, 1).  A chunk is a
+    leaf of a node when it starts inside the node and stops at or beyond the
+    node's stop, as in get_leafs.  A node's stop is also how far its path
+    covers the data, so the search succeeds at the first node whose stop is
+    nbytes, and paths are kept as one parent pointer per node.
+
+    Every chunk adds its own cost no matter which node reaches it, so the
+    first time a chunk is reached is also its cheapest, and it is queued
+    only once.  Chunks that start inside a popped node but stop short of it
+    can only lead to leafs the node already reaches more cheaply, so they
+    are dropped at the same time.  Chunks that stop beyond nbytes can never
+    finish a path.  Each chunk therefore leaves the ChunkIndex exactly once
+    and the search runs in O(n log n).
+
+    Parameters:
+    -----------
+    cost_data : dict, ChunkIndex
+        dictionary of node, cost pairs, or an unsearched index of them
     nbytes : int
         number of bytes indicating success
+    return_plan : bool
+        also return the chunks on the cheapest path
 
     Returns:
     --------
     cost : float, None
         cost of the cheapest path, or None if no valid path found
+    plan : list of tuples, None
+        only if return_plan is set, the chunks to request in byte order
 
     """
 
-    explored = set()
-    queue = []
-    node_info = namedtuple('point', 'cost chunk path')
+    origin = (0, 1)
 
-    #-- Initialize queue at a zero-cost origin
-    hq.heappush(queue, node_info(0, (0, 1), [(0, 1)]) )
+    if isinstance(cost_data, ChunkIndex):
+        index = cost_data
+    else:
+        index = ChunkIndex(cost_data)
+
+    queue = [(0, origin)]
+    parents = {origin: None}
 
     while len(queue):
-        cost, node, path = hq.heappop(queue)
+        cost, node = hq.heappop(queue)
 
         #-- Exit on success condition of containing all needed bytes
-        if byte_check(nbytes, path):
+        if node[1] == nbytes:
+            if return_plan:
+                return cost, _follow_parents(parents, node)
             return cost
 
-        explored.add(node)
+        for i in index.pop_range(node[0], node[1]):
+            leaf = index.chunks[i]
+            if node[1] <= leaf[1] <= nbytes and leaf != origin:
+                parents[leaf] = node
+                hq.heappush(queue, (cost + index.costs[i], leaf))
 
-        for leaf in get_leafs(node, cost_data.iterkeys()):
-            leaf_cost = cost + cost_data[leaf]
+    if return_plan:
+        return None, None
+    return None
 
-            if not leaf in explored:    
-                queue_cost = [item.cost for item in queue]
-                queue_nodes = [item.chunk for item in queue]
+#-------------------------------------------------------------------------------
+
+def _follow_parents(parents, node):
+    """Chunks from the origin to node, in order, excluding the origin."""
+
+    plan = []
+    while parents[node] is not None:
+        plan.append(node)
+        node = parents[node]
+
+    return plan[::-1]
+
+#-------------------------------------------------------------------------------
+
+def sweep_line_search(cost_data, nbytes, return_plan=False):
+    """Find the cheapest cover of bytes 0 to nbytes by dynamic programming.
+
+    Gives the same answers as uniform_cost_search.  Chunks are swept in
+    order of their stop byte, and the best cost of a cover ending with a
+    chunk is its own cost plus the cheapest cover already ending anywhere
+    from its start byte up to (but not including) its stop byte.
+
+    Those earlier covers are kept on a stack that increases in both stop
+    byte and cost: a cover that reaches further for less makes any entry
+    before it useless.  The cheapest cover ending at or after a byte is
+    then the first stack entry at or after it, found with a bisection.
+
+    Parameters:
+    -----------
+    cost_data : dict
+        dictionary of node, cost pairs
+    nbytes : int
+        number of bytes indicating success
+    return_plan : bool
+        also return the chunks of the cheapest cover
 
-                if not leaf in queue_nodes:
-                    hq.heappush(queue, node_info(leaf_cost, leaf, path + [leaf]))
+    Returns:
+    --------
+    cost : float, None
+        cost of the cheapest path, or None if no valid path found
+    plan : list of tuples, None
+        only if return_plan is set, the chunks to request in byte order
 
-                elif (leaf in queue_nodes):
-                    leaf_index = queue_nodes.index(leaf)
-                    if leaf_cost < queue_cost[leaf_index]:
-                        queue[leaf_index] = (leaf_cost, leaf, path + [leaf])
-                        hq.heapify(queue)
-                        
-        
+    """
+
+    #-- same zero-cost origin as uniform_cost_search
+    origin = (0, 1)
+    parents = {origin: None}
+
+    if nbytes == origin[1]:
+        return (0, []) if return_plan else 0
+
+    stack_stops = [origin[1]]
+    stack_costs = [0]
+    stack_chunks = [origin]
+
+    chunks = sorted((chunk for chunk in cost_data
+                     if chunk[1] <= nbytes and chunk != origin),
+                    key=itemgetter(1))
+
+    for stop, group in groupby(chunks, key=itemgetter(1)):
+        best = None
+        for chunk in group:
+            i = bisect_left(stack_stops, chunk[0])
+            if i == len(stack_stops) or stack_stops[i] >= stop:
+                continue
+
+            cost = stack_costs[i] + cost_data[chunk]
+            if best is None or cost < best:
+                best = cost
+                best_chunk = chunk
+                parents[chunk] = stack_chunks[i]
+
+        if best is None:
+            continue
+
+        if stop == nbytes:
+            if return_plan:
+                return best, _follow_parents(parents, best_chunk)
+            return best
+
+        while stack_costs and stack_costs[-1] >= best:
+            stack_stops.pop()
+            stack_costs.pop()
+            stack_chunks.pop()
+
+        stack_stops.append(stop)
+        stack_costs.append(best)
+        stack_chunks.append(best_chunk)
+
+    if return_plan:
+        return None, None
     return None
 
 #-------------------------------------------------------------------------------
 
+class _SortedChunks(object):
+    """Chunks sorted by (start, stop), stored in blocks of bounded size.
+
+    Inserting only shifts one block, so it stays cheap however many chunks
+    there are, while a range of starts is still found by bisection.
+
+    """
+
+    load = 512
+
+    def __init__(self):
+        self._blocks = []
+        self._firsts = []
+
+    def __len__(self):
+        return sum(len(block) for block in self._blocks)
+
+    def add(self, chunk):
+        """Insert chunk, returning False if it was already present."""
+
+        if not self._blocks:
+            self._blocks.append([chunk])
+            self._firsts.append(chunk)
+            return True
+
+        i = max(bisect_right(self._firsts, chunk) - 1, 0)
+        block = self._blocks[i]
+
+        j = bisect_left(block, chunk)
+        if j < len(block) and block[j] == chunk:
+            return False
+
+        block.insert(j, chunk)
+        self._firsts[i] = block[0]
+
+        if len(block) > 2 * self.load:
+            self._blocks[i:i + 1] = [block[:self.load], block[self.load:]]
+            self._firsts[i:i + 1] = [block[0], block[self.load]]
+
+        return True
+
+    def between(self, low, high):
+        """Iterate over the chunks with low < start <= high."""
+
+        after = (low, float('inf'))
+
+        i = max(bisect_right(self._firsts, after) - 1, 0)
+        for block in self._blocks[i:]:
+            for chunk in block[bisect_right(block, after):]:
+                if chunk[0] > high:
+                    return
+                yield chunk
+
+#-------------------------------------------------------------------------------
+
+class DownlinkPlanner(object):
+    """Keep the best downlink plan up to date as chunks become available.
+
+    Uses the same cost model (read_time) and zero-cost origin as
+    uniform_cost_search, so once the chunks cover the image best_time
+    matches optimal_time on the same chunks.
+
+    The planner keeps a frontier of the cheapest known covers, one per stop
+    byte, in which both stop and cost increase: a cover that reaches further
+    for less makes any earlier one useless.  A new chunk extends the
+    frontier entry it starts in.  If that gives a new frontier entry, only
+    chunks starting between it and the entry before it can get cheaper, and
+    those are re-checked in order of cost.  Every insert therefore touches
+    just the chunks whose best cost really changes.
+
+    Parameters:
+    -----------
+    total_bytes : int
+        bytes in the original data.
+    latency : float, int
+        Latency of the connection in seconds.
+    bandwidth : float, int
+        Bandiwidth of the connection in bytes per second.
+
+    """
+
+    origin = (0, 1)
+
+    def __init__(self, total_bytes, latency, bandwidth):
+        self.total_bytes = total_bytes
+        self.latency = latency
+        self.bandwidth = bandwidth
+
+        self._chunks = _SortedChunks()
+
+        #-- merged byte ranges covered by the usable chunks
+        self._cover_starts = []
+        self._cover_stops = []
+
+        #-- frontier entries are (cost, stop, chunk, parent entry)
+        origin_entry = (0, self.origin[1], None, None)
+        self._front_stops = [origin_entry[1]]
+        self._front = [origin_entry]
+
+    def add_chunk(self, start, stop):
+        """Make the chunk from start to stop available to the plan.
+
+        Returns:
+        --------
+        best_time : float, None
+            the current best downlink time, see best_time
+
+        """
+
+        chunk = (start, stop)
+
+        #-- chunks past the end of the image can never finish a download
+        if stop > self.total_bytes or not self._chunks.add(chunk):
+            return self.best_time
+
+        self._add_cover(start, stop)
+
+        if chunk != self.origin:
+            queue = []
+            self._extend(chunk, queue)
+            self._settle(queue)
+
+        return self.best_time
+
+    def _add_cover(self, start, stop):
+        first = bisect_left(self._cover_stops, start)
+        last = bisect_right(self._cover_starts, stop)
+
+        if first < last:
+            start = min(start, self._cover_starts[first])
+            stop = max(stop, self._cover_stops[last - 1])
+
+        self._cover_starts[first:last] = [start]
+        self._cover_stops[first:last] = [stop]
+
+    def _extend(self, chunk, queue):
+        """Queue chunk on top of the cheapest frontier entry it can extend."""
+
+        front = self._front
+        front_stops = self._front_stops
+
+        i = bisect_left(front_stops, chunk[0])
+        if i == len(front) or front_stops[i] >= chunk[1]:
+            return
+
+        parent = front[i]
+        cost = parent[0] + read_time(chunk[1] - chunk[0],
+                                     self.bandwidth,
+                                     self.latency)
+
+        #-- no point queueing what the frontier already beats
+        j = bisect_left(front_stops, chunk[1], i)
+        if j < len(front) and front[j][0] <= cost:
+            return
+
+        hq.heappush(queue, (cost, chunk[1], chunk, parent))
+
+    def _settle(self, queue):
+        front = self._front
+        front_stops = self._front_stops
+
+        while queue:
+            entry = hq.heappop(queue)
+            cost, stop = entry[:2]
+
+            #-- skip if something reaches at least as far for no more
+            j = bisect_left(front_stops, stop)
+            if j < len(front) and front[j][0] <= cost:
+                continue
+
+            if j < len(front) and front_stops[j] == stop:
+                last = j + 1
+            else:
+                last = j
+
+            first = j
+            while first and front[first - 1][0] >= cost:
+                first -= 1
+
+            front[first:last] = [entry]
+            front_stops[first:last] = [stop]
+
+            #-- chunks starting after the previous entry now build on this one
+            previous = front_stops[first - 1] if first else float('-inf')
+            for chunk in self._chunks.between(previous, stop):
+                if chunk[1] > stop:
+                    self._extend(chunk, queue)
+
+    @property
+    def gaps(self):
+        """(start, stop) of each byte range no usable chunk covers yet."""
+
+        gaps = []
+        covered_to = 0
+        for start, stop in zip(self._cover_starts, self._cover_stops):
+            if start > covered_to:
+                gaps.append((covered_to, start))
+            covered_to = max(covered_to, stop)
+
+        if covered_to < self.total_bytes:
+            gaps.append((covered_to, self.total_bytes))
+
+        return gaps
+
+    @property
+    def covered(self):
+        """Whether or not the data can be recovered yet."""
+
+        return bool(self._cover_starts and self._cover_starts[0] <= 0 and
+                    self._cover_stops[0] >= self.total_bytes)
+
+    def _final_entry(self):
+        if not self.covered:
+            return None
+
+        i = bisect_left(self._front_stops, self.total_bytes)
+        if i < len(self._front) and self._front_stops[i] == self.total_bytes:
+            return self._front[i]
+
+        return None
+
+    @property
+    def best_time(self):
+        """The smallest time to read the whole image, or None if impossible."""
+
+        entry = self._final_entry()
+
+        return None if entry is None else entry[0]
+
+    @property
+    def plan(self):
+        """Chunks to request for best_time, in byte order, or None."""
+
+        entry = self._final_entry()
+        if entry is None:
+            return None
+
+        chunks = []
+        while entry[2] is not None:
+            chunks.append(entry[2])
+            entry = entry[3]
+
+        return chunks[::-1]
+
+#-------------------------------------------------------------------------------
+
 def test_byte_check_pass():
     """Check cases for which the byte_check function should pass
     """
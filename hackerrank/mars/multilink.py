@@ -0,0 +1,154 @@
+"""Downlink scheduling over several concurrent links
+
+Each link fetches its chunks one after another with the same latency and
+bandwidth as the single link in hackerrank_practice, so a chunk takes
+read_time on whichever link it is given to.  The goal is the smallest
+makespan: the time until the last link finishes.
+
+Usage:
+    python multilink.py -k 4 < input000.txt
+
+"""
+
+import sys
+import heapq as hq
+from collections import namedtuple
+
+import hackerrank_practice as hp
+
+#-------------------------------------------------------------------------------
+
+LinkSchedule = namedtuple('LinkSchedule', 'makespan links link_times '
+                                          'single_link_time speedup')
+
+#-------------------------------------------------------------------------------
+
+def assign_links(chunks, cost_data, n_links):
+    """Spread chunks over n_links, longest first, each onto the least busy.
+
+    This is the longest-processing-time rule, which is always within 4/3 of
+    the best possible makespan for a fixed set of chunks.
+
+    Returns:
+    --------
+    makespan : float
+        time until the last link is done
+    links : list of lists
+        chunks fetched by each link, in byte order
+
+    """
+
+    loads = [(0, i) for i in xrange(n_links)]
+    links = [[] for _ in xrange(n_links)]
+
+    for chunk in sorted(chunks, key=lambda chunk: cost_data[chunk],
+                        reverse=True):
+        load, i = hq.heappop(loads)
+        links[i].append(chunk)
+        hq.heappush(loads, (load + cost_data[chunk], i))
+
+    return max(load for load, _ in loads), [sorted(link) for link in links]
+
+#-------------------------------------------------------------------------------
+
+def parallel_schedule(cost_data, nbytes, n_links, n_candidates=16):
+    """Pick a covering set of chunks and assign it to n_links links.
+
+    The cheapest single-link cover minimises the total work, but one long
+    chunk in it can hold up the makespan.  Covers built only from chunks
+    below a cost cap trade more total work for shorter chunks, so the
+    cheapest cover under each of n_candidates caps, between the smallest
+    cap that still covers the image and the longest chunk of the
+    single-link plan, is also scheduled, and the best makespan wins.
+
+    Parameters:
+    -----------
+    cost_data : dict
+        dictionary of (start, stop), read time pairs
+    nbytes : int
+        number of bytes in the image
+    n_links : int
+        number of concurrent links
+    n_candidates : int
+        number of cost caps to try
+
+    Returns:
+    --------
+    schedule : LinkSchedule, None
+        makespan, the chunks of each link, the busy time of each link, the
+        single-link optimal time and its ratio to the makespan; None if the
+        chunks cannot cover the image
+
+    """
+
+    if n_links < 1:
+        raise ValueError("n_links must be at least 1")
+
+    single_time, single_plan = hp.sweep_line_search(cost_data, nbytes,
+                                                    return_plan=True)
+    if single_time is None:
+        return None
+
+    def capped_plan(cap):
+        capped = dict((chunk, cost) for chunk, cost in cost_data.items()
+                      if cost <= cap)
+        return hp.sweep_line_search(capped, nbytes, return_plan=True)[1]
+
+    #-- smallest chunk cost cap that still allows a cover
+    longest = max([0] + [cost_data[chunk] for chunk in single_plan])
+    caps = sorted(set(cost for cost in cost_data.values() if cost <= longest))
+    low, high = 0, len(caps) - 1
+    while low < high:
+        middle = (low + high) // 2
+        if capped_plan(caps[middle]) is None:
+            low = middle + 1
+        else:
+            high = middle
+
+    step = max(1, len(caps[low:]) // n_candidates)
+    candidates = [single_plan] + [capped_plan(cap)
+                                  for cap in caps[low::step]]
+
+    best = None
+    for plan in candidates:
+        makespan, links = assign_links(plan, cost_data, n_links)
+        if best is None or makespan < best[0]:
+            best = makespan, links
+
+    makespan, links = best
+    link_times = [sum(cost_data[chunk] for chunk in link) for link in links]
+    speedup = single_time / makespan if makespan else 1.0
+
+    return LinkSchedule(makespan, links, link_times, single_time, speedup)
+
+#-------------------------------------------------------------------------------
+
+def optimal_parallel_time(input_string, n_links):
+    """parallel_schedule for input in the format read by optimal_time."""
+
+    total_bytes, data = hp.parse_input(input_string)
+
+    if not hp.byte_check(total_bytes, data):
+        return None
+
+    return parallel_schedule(data, total_bytes, n_links)
+
+#-------------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-k', '--links', type=int, default=2,
+                        help='number of concurrent links')
+    args = parser.parse_args()
+
+    schedule = optimal_parallel_time(sys.stdin.read(), args.links)
+
+    if schedule:
+        print "{0:.3f}".format(schedule.makespan)
+        for i, (link, link_time) in enumerate(zip(schedule.links,
+                                                  schedule.link_times)):
+            print "link {}: {:.3f} s {}".format(i, link_time, link)
+        print "single link: {:.3f} s, speedup {:.2f}x".format(
+            schedule.single_link_time, schedule.speedup)
@@ -1,3 +1,5 @@
+import random
+
 import hackerrank_practice as hp
 import numpy as np
 
@@ -80,3 +82,377 @@ def test_ucs():
     assert hp.uniform_cost_search(cost_data, nbytes) == None, 'nope'
 
 #-------------------------------------------------------------------------------
+
+def test_chunk_index():
+    index = hp.ChunkIndex({(0, 10):1, (5, 20):1, (5, 8):1, (30, 40):1})
+    assert index.chunks == [(0, 10), (5, 8), (5, 20), (30, 40)], 'nope'
+
+    assert index.pop_range(5, 25) == [1, 2], 'nope'
+    assert index.pop_range(0, 25) == [0], 'nope'
+    assert index.pop_range(0, 25) == [], 'nope'
+    assert index.pop_range(40, 50) == [], 'nope'
+    assert index.pop_range(0, 100) == [3], 'nope'
+
+def test_chunk_index_arrays():
+    random.seed(12)
+
+    for _ in xrange(200):
+        nbytes, chunks = random_chunks(30, 12)
+        chunks += random.sample(chunks, len(chunks) // 3) + [(0, 1)]
+        starts = np.array([start for start, _ in chunks], dtype=np.int64)
+        stops = np.array([stop for _, stop in chunks], dtype=np.int64)
+        costs = hp.read_time(stops - starts, 10, 1)
+        cost_data = dict(zip(chunks, costs.tolist()))
+
+        #-- repeats are dropped and the order matches the dict index
+        index = hp.ChunkIndex.from_arrays(starts, stops, costs)
+        expected = hp.ChunkIndex(cost_data)
+        assert index.chunks == expected.chunks == sorted(cost_data), 'nope'
+        assert index.costs == expected.costs, 'nope'
+
+        #-- values too large to pack into one sort key
+        huge = hp.ChunkIndex.from_arrays(starts + 2 ** 40, stops + 2 ** 40,
+                                         costs)
+        assert huge.chunks == [(start + 2 ** 40, stop + 2 ** 40)
+                               for start, stop in expected.chunks], 'nope'
+
+        #-- the origin chunk and chunks past nbytes are skipped by the search
+        assert hp.uniform_cost_search(index, nbytes, True) == \
+            hp.uniform_cost_search(cost_data, nbytes, True), 'nope'
+
+    empty = hp.ChunkIndex.from_arrays(np.array([], dtype=np.int64),
+                                      np.array([], dtype=np.int64),
+                                      np.array([]))
+    assert empty.chunks == [] and empty.pop_range(0, 10) == [], 'nope'
+    assert hp.uniform_cost_search(empty, 10) is None, 'nope'
+
+#-------------------------------------------------------------------------------
+
+def brute_force_cost(cost_data, nbytes):
+    """Cheapest subset of chunks that byte_check accepts, by enumeration"""
+    from itertools import combinations
+
+    chunks = [chunk for chunk in cost_data if chunk != (0, 1)]
+
+    best = None
+    for n in xrange(len(chunks) + 1):
+        for subset in combinations(chunks, n):
+            if hp.byte_check(nbytes, list(subset) + [(0, 1)]):
+                cost = sum(cost_data[chunk] for chunk in subset)
+                if best is None or cost < best:
+                    best = cost
+
+    return best
+
+#-------------------------------------------------------------------------------
+
+def random_chunks(max_bytes, max_chunks, min_bytes=1, min_chunks=0):
+    """Random image size and chunks, some reaching past the end of the image.
+
+    Returns:
+    --------
+    nbytes : int
+        bytes in the image
+    chunks : list of tuples
+        (start, stop) of each chunk, possibly with repeats
+
+    """
+
+    nbytes = random.randint(min_bytes, max_bytes)
+
+    chunks = []
+    for _ in xrange(random.randint(min_chunks, max_chunks)):
+        start = random.randint(0, nbytes)
+        chunks.append((start, random.randint(start, nbytes + 2)))
+
+    return nbytes, chunks
+
+#-------------------------------------------------------------------------------
+
+def test_ucs_random():
+    random.seed(11)
+
+    for _ in xrange(300):
+        nbytes, chunks = random_chunks(30, 8)
+        cost_data = dict((chunk, random.choice([1, 2, 3, 5, 0.5]))
+                         for chunk in chunks)
+
+        assert hp.uniform_cost_search(cost_data, nbytes) == \
+            brute_force_cost(cost_data, nbytes), 'nope'
+
+#-------------------------------------------------------------------------------
+
+def test_given_cases_dp():
+    assert hp.optimal_time(open('input000.txt').read(), engine='dp') == \
+        float(open('output000.txt').read()), "test-case 0 failed"
+
+    assert hp.optimal_time(open('input001.txt').read(), engine='dp') == \
+        float(open('output001.txt').read()), "test-case 1 failed"
+
+    assert hp.optimal_time(open('crap_input.txt').read(), engine='dp') == \
+        float(open('output000.txt').read()), "crap test-case 0 failed"
+
+    assert_raises(ValueError, hp.optimal_time, open('input000.txt').read(),
+                  engine='bfs')
+
+#-------------------------------------------------------------------------------
+
+def test_dp_matches_ucs():
+    random.seed(12)
+
+    for name in ['input000.txt', 'input001.txt', 'input_100000.txt']:
+        assert hp.optimal_time(open(name).read(), engine='dp') == \
+            hp.optimal_time(open(name).read(), engine='ucs'), name
+
+    for _ in xrange(500):
+        nbytes, chunks = random_chunks(200, 40)
+        cost_data = dict((chunk, random.randint(1, 20)) for chunk in chunks)
+
+        assert hp.sweep_line_search(cost_data, nbytes) == \
+            hp.uniform_cost_search(cost_data, nbytes), 'nope'
+
+#-------------------------------------------------------------------------------
+
+def test_parse_stream():
+    from StringIO import StringIO
+
+    data = hp.parse_stream(open('crap_input.txt'))
+    assert (data.total_bytes, data.latency, data.bandwidth) == (2000, 15, 10)
+    assert data.starts.tolist() == [0, 200, 600, 800, 1000, 0], 'nope'
+    assert data.stops.tolist() == [200, 400, 800, 1000, 2000, 1800], 'nope'
+    assert data.costs.tolist() == [50, 50, 50, 50, 130, 210], 'nope'
+    assert [error.line_number for error in data.errors] == [7, 10, 12], 'nope'
+    assert data.errors[2].text == 'adfsa', 'nope'
+
+    #-- block boundaries must not change the result
+    for block_bytes in [1, 3, 8, 100]:
+        small = hp.parse_stream(open('crap_input.txt'), block_bytes)
+        assert small.starts.tolist() == data.starts.tolist(), 'nope'
+        assert small.errors == data.errors, 'nope'
+
+    clean = hp.parse_stream(StringIO('10\n1\n1\n2\n+1 , 5\n\t2,-4'))
+    assert clean.starts.tolist() == [1, 2], 'nope'
+    assert clean.stops.tolist() == [5, -4], 'nope'
+    assert clean.errors == [], 'nope'
+
+    assert_raises(ValueError, hp.parse_stream, StringIO('10\n1\n'))
+
+#-------------------------------------------------------------------------------
+
+def test_check_coverage():
+    starts = np.array([0, 10, 30, 25, 60])
+    stops = np.array([10, 20, 40, 35, 200])
+
+    assert hp.check_coverage(40, starts, stops) == (False, [(20, 25)]), 'nope'
+    assert hp.check_coverage(50, starts, stops) == \
+        (False, [(20, 25), (40, 50)]), 'nope'
+    assert hp.check_coverage(20, starts, stops) == (True, []), 'nope'
+    assert hp.check_coverage(20, starts[1:], stops[1:]) == \
+        (False, [(0, 10)]), 'nope'
+    assert hp.check_coverage(20, [], []) == (False, [(0, 20)]), 'nope'
+
+    #-- overlapping chunks may run past each other as long as one stops at 20
+    assert hp.byte_check(20, [(0, 15), (10, 20), (15, 30)]), 'nope'
+    assert not hp.byte_check(20, [(0, 30)]), 'nope'
+
+#-------------------------------------------------------------------------------
+
+def test_planner_given_cases():
+    for input_name, output_name in [('input000.txt', 'output000.txt'),
+                                    ('input001.txt', 'output001.txt')]:
+        data = hp.parse_stream(open(input_name))
+        planner = hp.DownlinkPlanner(data.total_bytes, data.latency,
+                                     data.bandwidth)
+
+        for start, stop in zip(data.starts, data.stops):
+            best_time = planner.add_chunk(start, stop)
+
+        assert best_time == float(open(output_name).read()), input_name
+        assert sum(hp.read_time(stop - start, data.bandwidth, data.latency)
+                   for start, stop in planner.plan) == best_time, input_name
+
+#-------------------------------------------------------------------------------
+
+def test_planner_incremental():
+    random.seed(15)
+
+    for _ in xrange(200):
+        nbytes, chunks = random_chunks(60, 30, min_chunks=1)
+        latency = random.randint(0, 3)
+        planner = hp.DownlinkPlanner(nbytes, latency, 1)
+
+        cost_data = {}
+        for start, stop in chunks:
+            cost_data[(start, stop)] = hp.read_time(stop - start, 1, latency)
+
+            best_time = planner.add_chunk(start, stop)
+
+            covered = hp.byte_check(nbytes, cost_data)
+            assert planner.covered == covered, 'nope'
+            assert planner.gaps == hp.check_coverage(
+                nbytes, *zip(*cost_data))[1], 'nope'
+
+            if covered:
+                expected = hp.uniform_cost_search(cost_data, nbytes)
+            else:
+                expected = None
+            assert best_time == expected, 'nope'
+
+#-------------------------------------------------------------------------------
+
+def test_plans():
+    random.seed(16)
+
+    assert hp.optimal_time(open('input000.txt').read(), return_plan=True) == \
+        (340, [(0, 1800), (1000, 2000)]), 'nope'
+
+    for _ in xrange(300):
+        nbytes, chunks = random_chunks(100, 30, min_bytes=2)
+        cost_data = dict((chunk, random.randint(1, 20)) for chunk in chunks)
+
+        for search in [hp.uniform_cost_search, hp.sweep_line_search]:
+            cost, plan = search(cost_data, nbytes, return_plan=True)
+            assert cost == search(cost_data, nbytes), 'nope'
+
+            if cost is None:
+                assert plan is None, 'nope'
+                continue
+
+            assert sum(cost_data[chunk] for chunk in plan) == cost, 'nope'
+            assert hp.byte_check(nbytes, plan + [(0, 1)]), 'nope'
+
+#-------------------------------------------------------------------------------
+
+def test_workload():
+    import workload
+
+    total_bytes, starts, stops = workload.generate_chunks(500, seed=1)
+    assert total_bytes == 500000, 'nope'
+    assert len(starts) == 500, 'nope'
+    assert ((stops > starts) & (stops <= total_bytes)).all(), 'nope'
+    assert hp.check_coverage(total_bytes, starts, stops)[0], 'nope'
+
+    again = workload.generate_chunks(500, seed=1)
+    assert (again[1] == starts).all() and (again[2] == stops).all(), 'nope'
+
+    total_bytes, starts, stops = workload.generate_chunks(500, gaps=3, seed=1)
+    covered, gaps = hp.check_coverage(total_bytes, starts, stops)
+    assert not covered and len(gaps) >= 3, 'nope'
+
+#-------------------------------------------------------------------------------
+
+def test_find_regressions():
+    import workload
+
+    baseline = {'100': {'parse_input': 1.0, 'byte_check': 0.001}}
+    results = {'100': {'parse_input': 1.2, 'byte_check': 0.005},
+               '1000': {'parse_input': 9.0}}
+
+    assert workload.find_regressions(results, baseline) == [], 'nope'
+    assert workload.find_regressions(results, baseline, threshold=0.1) == \
+        [('100', 'parse_input', 1.2, 1.0)], 'nope'
+
+#-------------------------------------------------------------------------------
+
+def test_multilink():
+    import multilink
+
+    input_string = open('input000.txt').read()
+    single = hp.optimal_time(input_string)
+
+    schedule = multilink.optimal_parallel_time(input_string, 1)
+    assert schedule.makespan == single, 'nope'
+    assert schedule.speedup == 1, 'nope'
+
+    schedule = multilink.optimal_parallel_time(input_string, 3)
+    assert schedule.makespan == 150, 'nope'
+    assert schedule.makespan == max(schedule.link_times), 'nope'
+    assert schedule.single_link_time == single, 'nope'
+
+    chunks = [chunk for link in schedule.links for chunk in link]
+    assert hp.byte_check(2000, chunks), 'nope'
+
+    assert multilink.optimal_parallel_time(
+        '2000\n15\n10\n1\n0,200\n', 2) is None, 'nope'
+    assert_raises(ValueError, multilink.optimal_parallel_time, input_string, 0)
+
+#-------------------------------------------------------------------------------
+
+def test_downlink():
+    import downlink
+
+    input_string = open('input000.txt').read()
+    image = ''.join(chr(i % 256) for i in xrange(2000))
+
+    result = downlink.run_downlink(input_string, 2, time_scale=1e-3,
+                                   image=image)
+    assert str(result.image) == image, 'nope'
+    assert len(result.link_times) == 2, 'nope'
+
+    for timing in result.timings:
+        assert timing.measured >= 0.9 * timing.predicted, 'nope'
+
+    assert downlink.run_downlink('2000\n15\n10\n1\n0,200\n', 2) is None, 'nope'
+
+    #-- a short link next to a long one is timed on its own
+    server = downlink.ChunkServer(image, 15, 10, time_scale=0.01)
+    try:
+        result = downlink.fetch_links(server.server_address,
+                                      [[(0, 1900)], [(1900, 2000)]], 2000,
+                                      15, 10, time_scale=0.01)
+    finally:
+        server.close()
+
+    assert str(result.image) == image, 'nope'
+    for measured, predicted in zip(result.link_times,
+                                   result.predicted_link_times):
+        assert abs(measured - predicted) < 0.25 * predicted, 'nope'
+
+#-------------------------------------------------------------------------------
+
+def test_downlink_errors():
+    import socket
+    import threading
+    import downlink
+
+    listener = socket.socket()
+    listener.bind(('127.0.0.1', 0))
+    address = listener.getsockname()
+
+    #-- a server that hangs up before sending anything
+    listener.listen(2)
+    def hang_up():
+        for _ in xrange(2):
+            listener.accept()[0].close()
+    thread = threading.Thread(target=hang_up)
+    thread.start()
+
+    assert_raises(IOError, downlink.fetch_links, address,
+                  [[(0, 100)], [(100, 200)]], 200, 15, 10, 1e-3)
+    thread.join()
+
+    #-- nothing listening any more
+    listener.close()
+    assert_raises(socket.error, downlink.fetch_links, address,
+                  [[(0, 100)]], 100, 15, 10, 1e-3)
+
+#-------------------------------------------------------------------------------
+
+def test_batch():
+    import batch
+
+    files = batch.find_files(['.'], 'input00*.txt')
+    assert files == ['./input000.txt', './input001.txt'], 'nope'
+
+    results = list(batch.solve_files(files + ['no_such_file.txt'], workers=2))
+    assert [result.path for result in results] == \
+        files + ['no_such_file.txt'], 'nope'
+    assert [result.best_time for result in results] == \
+        [float(open(name).read()) for name in
+         ['output000.txt', 'output001.txt']] + [None], 'nope'
+    assert results[-1].error.startswith('IOError'), 'nope'
+
+    result = batch.solve_file('crap_input.txt')
+    assert result.best_time == 340 and result.error is None, 'nope'
+
+#-------------------------------------------------------------------------------
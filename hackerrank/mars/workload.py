@@ -0,0 +1,263 @@
+"""Synthetic chunk files and scaling benchmarks for hackerrank_practice
+
+Generate a file:
+    python workload.py generate out.txt --chunks 100000 --gaps 2
+
+Time parse_input, byte_check and uniform_cost_search from 1e2 to 1e6 chunks,
+failing if any step is more than 25% slower than the stored baseline:
+    python workload.py benchmark --output bench.json --baseline baseline.json
+
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+import hackerrank_practice as hp
+
+#-------------------------------------------------------------------------------
+
+def generate_chunks(n_chunks, total_bytes=None, overlap=3.0, gaps=0,
+                    gap_size=None, seed=0):
+    """Make a random set of chunks over an image.
+
+    One tenth of the chunks tile the image end to end so that it is covered,
+    and the rest start anywhere with exponentially distributed lengths.
+
+    Parameters:
+    -----------
+    n_chunks : int
+        number of chunks to make before any are dropped for gaps
+    total_bytes : int, None
+        bytes in the image, defaults to 1000 per chunk
+    overlap : float
+        average number of chunks covering each byte
+    gaps : int
+        number of byte ranges to leave uncovered.  Every chunk reaching into
+        one is dropped, so the uncovered ranges around them can be wider.
+    gap_size : int, None
+        bytes in each gap, defaults to a tenth of the mean chunk length
+    seed : int
+        seed for the random number generator
+
+    Returns:
+    --------
+    total_bytes : int
+        bytes in the image
+    starts, stops : np.ndarray
+        start and stop byte of each chunk, in random order
+
+    """
+
+    rng = np.random.RandomState(seed)
+
+    if total_bytes is None:
+        total_bytes = 1000 * n_chunks
+
+    n_tiles = max(1, n_chunks // 10)
+    n_extra = n_chunks - n_tiles
+
+    edges = np.unique(rng.randint(1, total_bytes, n_tiles - 1))
+    edges = np.concatenate(([0], edges, [total_bytes]))
+
+    mean_length = max(1.0, overlap * total_bytes / float(n_chunks))
+    extra_starts = rng.randint(0, total_bytes, n_extra)
+    extra_lengths = 1 + rng.exponential(mean_length, n_extra).astype(np.int64)
+    extra_stops = np.minimum(extra_starts + extra_lengths, total_bytes)
+
+    starts = np.concatenate((edges[:-1], extra_starts))
+    stops = np.concatenate((edges[1:], extra_stops))
+
+    if gaps:
+        if gap_size is None:
+            gap_size = max(1, int(mean_length // 10))
+
+        gap_starts = np.sort(rng.randint(1, total_bytes - gap_size, gaps))
+        gap_stops = gap_starts + gap_size
+
+        #-- drop every chunk that reaches into a gap
+        first = np.searchsorted(gap_stops, starts, side='right')
+        hits = first < gaps
+        hits[hits] = gap_starts[first[hits]] < stops[hits]
+        starts = starts[~hits]
+        stops = stops[~hits]
+
+    order = rng.permutation(len(starts))
+
+    return total_bytes, starts[order], stops[order]
+
+#-------------------------------------------------------------------------------
+
+def write_chunks(path, total_bytes, starts, stops, latency=15, bandwidth=10):
+    """Write chunks in the input format read by parse_input."""
+
+    with open(path, 'w') as out:
+        out.write('{}\n{}\n{}\n{}\n'.format(total_bytes, latency, bandwidth,
+                                            len(starts)))
+        np.savetxt(out, np.column_stack((starts, stops)), fmt='%d',
+                   delimiter=',')
+
+#-------------------------------------------------------------------------------
+
+def time_steps(path, repeat=1):
+    """Time each solver step on one chunk file.
+
+    Parameters:
+    -----------
+    path : str
+        chunk file to solve
+    repeat : int
+        number of runs, the fastest of which is kept
+
+    Returns:
+    --------
+    timings : dict
+        seconds spent in parse_input, byte_check and uniform_cost_search
+
+    """
+
+    input_string = open(path).read()
+
+    timings = {}
+    for _ in xrange(repeat):
+        start = time.time()
+        total_bytes, cost_data = hp.parse_input(input_string)
+        parsed = time.time()
+        hp.byte_check(total_bytes, cost_data)
+        checked = time.time()
+        hp.uniform_cost_search(cost_data, total_bytes)
+        searched = time.time()
+
+        for step, seconds in [('parse_input', parsed - start),
+                              ('byte_check', checked - parsed),
+                              ('uniform_cost_search', searched - checked)]:
+            timings[step] = min(timings.get(step, seconds), seconds)
+
+    return timings
+
+#-------------------------------------------------------------------------------
+
+def run_benchmark(sizes=(100, 1000, 10000, 100000, 1000000), seed=0, repeat=1,
+                  **kwargs):
+    """Time the solver steps on generated files of increasing size.
+
+    Extra keyword arguments are passed on to generate_chunks.
+
+    Returns:
+    --------
+    results : dict
+        timings from time_steps, keyed by the number of chunks as a string
+
+    """
+
+    results = {}
+
+    handle, path = tempfile.mkstemp(suffix='.txt')
+    os.close(handle)
+    try:
+        for n_chunks in sizes:
+            write_chunks(path, *generate_chunks(n_chunks, seed=seed, **kwargs))
+            results[str(n_chunks)] = time_steps(path, repeat)
+    finally:
+        os.remove(path)
+
+    return results
+
+#-------------------------------------------------------------------------------
+
+def find_regressions(results, baseline, threshold=0.25, min_seconds=0.01):
+    """Compare benchmark results against a baseline run.
+
+    Parameters:
+    -----------
+    results, baseline : dict
+        as returned by run_benchmark
+    threshold : float
+        allowed fractional slowdown before a step counts as a regression
+    min_seconds : float
+        steps faster than this in both runs are too noisy to compare
+
+    Returns:
+    --------
+    regressions : list of tuples
+        (size, step, seconds, baseline seconds) of every step that slowed
+        down by more than threshold
+
+    """
+
+    regressions = []
+    for size in sorted(results, key=int):
+        for step, seconds in sorted(results[size].items()):
+            reference = baseline.get(size, {}).get(step)
+            if reference is None or max(seconds, reference) < min_seconds:
+                continue
+
+            if seconds > reference * (1 + threshold):
+                regressions.append((size, step, seconds, reference))
+
+    return regressions
+
+#-------------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command')
+
+    generate = commands.add_parser('generate', help='write a chunk file')
+    generate.add_argument('path')
+    generate.add_argument('--chunks', type=int, default=1000)
+    generate.add_argument('--total-bytes', type=int, default=None)
+    generate.add_argument('--overlap', type=float, default=3.0)
+    generate.add_argument('--gaps', type=int, default=0)
+    generate.add_argument('--gap-size', type=int, default=None)
+    generate.add_argument('--latency', type=int, default=15)
+    generate.add_argument('--bandwidth', type=int, default=10)
+    generate.add_argument('--seed', type=int, default=0)
+
+    benchmark = commands.add_parser('benchmark', help='time the solver')
+    benchmark.add_argument('--sizes', type=int, nargs='+',
+                           default=[100, 1000, 10000, 100000, 1000000])
+    benchmark.add_argument('--output', default='benchmark.json')
+    benchmark.add_argument('--baseline', default=None)
+    benchmark.add_argument('--threshold', type=float, default=0.25)
+    benchmark.add_argument('--seed', type=int, default=0)
+    benchmark.add_argument('--repeat', type=int, default=1)
+
+    args = parser.parse_args()
+
+    if args.command == 'generate':
+        total_bytes, starts, stops = generate_chunks(args.chunks,
+                                                     args.total_bytes,
+                                                     args.overlap,
+                                                     args.gaps,
+                                                     args.gap_size,
+                                                     args.seed)
+        write_chunks(args.path, total_bytes, starts, stops,
+                     args.latency, args.bandwidth)
+        sys.exit(0)
+
+    results = run_benchmark(args.sizes, args.seed, args.repeat)
+
+    with open(args.output, 'w') as out:
+        json.dump(results, out, indent=2, sort_keys=True)
+
+    for size in sorted(results, key=int):
+        print '{:>8}  {}'.format(size, '  '.join(
+            '{}: {:.4f} s'.format(step, seconds)
+            for step, seconds in sorted(results[size].items())))
+
+    if args.baseline:
+        regressions = find_regressions(results, json.load(open(args.baseline)),
+                                       args.threshold)
+        for size, step, seconds, reference in regressions:
+            print 'REGRESSION {} chunks, {}: {:.4f} s vs {:.4f} s'.format(
+                size, step, seconds, reference)
+
+        if regressions:
+            sys.exit(1)
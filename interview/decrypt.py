@@ -14,15 +14,58 @@ List of cipher-matches:
 [('ABCA', 'XYZX'), ('ABCA', 'QWEQ'), ('QWEQ', 'XYZX'), ('FOOBAR', 'ABBCDE')]
 """
 
-from itertools import combinations
+import hashlib
+import mmap
+import multiprocessing
+import os
+import shutil
+import struct
+import sys
+import tempfile
+from collections import Counter, OrderedDict
+from itertools import islice
 
-def get_num_cipher_matches(input_list):
+def cipher_pattern(string):
+    """Canonical substitution-cipher pattern of a string
+
+    Each character is replaced by the order of its first appearance, so
+    'ABCA' and 'XYZX' both become (0, 1, 2, 0).  Two strings are cipher
+    matches exactly when their patterns are equal.
+
+    Parameters:
+    -----------
+    string : str
+        string to reduce
+
+    Returns:
+    --------
+    pattern : tuple
+        first-occurrence rank of every character
+
+    """
+
+    first = {}
+    return tuple([first.setdefault(char, len(first)) for char in string])
+
+
+def get_num_cipher_matches(input_list, workers=1, chunk_size=2**14):
     """Determine the number of possible cypher matches
+
+    Strings are grouped by cipher_pattern, so the count takes one pass over
+    the input rather than a comparison of every pair.  With more than one
+    worker the input is cut into shards of chunk_size strings, each shard is
+    reduced to a Counter of patterns in a process pool, and the Counters are
+    merged.
     
     Parameters:
     -----------
     input_list : list
         list of strings to check
+    workers : int, None
+        number of worker processes, None for the number of CPUs
+    chunk_size : int
+        strings sent to a worker at a time.  Larger shards cost fewer
+        round trips, smaller ones balance the load better.
     
     Returns:
     --------
@@ -33,13 +76,84 @@ def get_num_cipher_matches(input_list):
     
     if isinstance(input_list, str):
         return 0
-    
-    count = 0
-    for raw_string, cypher_string in combinations(input_list, 2):
-        if is_match(raw_string, cypher_string):
-            count += 1
-                
-    return count
+
+    if workers == 1:
+        groups = _count_patterns(input_list)
+    else:
+        strings = iter(input_list)
+        shards = iter(lambda: list(islice(strings, chunk_size)), [])
+
+        groups = Counter()
+        pool = multiprocessing.Pool(workers)
+        try:
+            for shard_groups in pool.imap_unordered(_count_patterns, shards):
+                groups.update(shard_groups)
+        finally:
+            pool.terminate()
+            pool.join()
+
+    #-- every pair within a group of k equal patterns is a match
+    return _count_pairs(groups)
+
+
+def _count_patterns(strings):
+    """Counter of cipher_pattern over strings"""
+
+    return Counter(cipher_pattern(string) for string in strings)
+
+
+def _count_pairs(groups):
+    """Number of matching pairs given the number of strings per pattern"""
+
+    return sum(k * (k - 1) // 2 for k in groups.itervalues())
+
+
+def iter_cipher_matches(strings, groups=False):
+    """Generate the cipher-matched pairs, or groups, of strings
+
+    Pairs stream out as the input is read: each string is paired with the
+    earlier strings of its cipher_pattern as soon as it arrives, so the
+    first pair is ready after its second string and no list of pairs is
+    ever built.  The strings seen so far are kept, grouped by pattern, to
+    pair with later ones.
+
+    A group is only complete once the input ends, so with groups=True the
+    whole input is read before the first group is yielded.
+
+    >>> matches = iter_cipher_matches(['ABCA', 'XYZX', 'AB', 'BA', 'QWEQ'])
+    >>> list(matches)
+    [('ABCA', 'XYZX'), ('AB', 'BA'), ('ABCA', 'QWEQ'), ('XYZX', 'QWEQ')]
+
+    Parameters:
+    -----------
+    strings : iterable
+        strings to check
+    groups : bool
+        yield each group of two or more mutually matching strings as a list
+        instead of its pairs
+
+    Returns:
+    --------
+    matches : generator
+        (earlier, later) pairs of matching strings in order of the later
+        one, or lists of them in order of first appearance
+
+    """
+
+    by_pattern = OrderedDict()
+    for string in strings:
+        group = by_pattern.setdefault(cipher_pattern(string), [])
+
+        if not groups:
+            for earlier in group:
+                yield earlier, string
+
+        group.append(string)
+
+    if groups:
+        for group in by_pattern.itervalues():
+            if len(group) > 1:
+                yield group
 
 
 def is_match(raw_string, cypher_string): 
@@ -60,25 +174,286 @@ def is_match(raw_string, cypher_string):
         
     """
     
-    if not len(raw_string) == len(cypher_string):
-        return False
-    
-    pairs = {}
-    
-    for raw_char, cypher_char in zip(raw_string, cypher_string):
-        
-        if cypher_char in pairs and pairs[cypher_char] != raw_char:
-            return False
-        elif not raw_char in pairs:
-            pairs[raw_char] = cypher_char
-        elif raw_char in pairs and pairs[raw_char] != cypher_char:
-            return False
-        else:
-            pass
-        
-    return True
+    return cipher_pattern(raw_string) == cipher_pattern(cypher_string)
+
+
+def count_cipher_matches_file(path, n_partitions=16, max_patterns=2**20,
+                              spill_dir=None):
+    """Count cipher matches among the lines of a file too large for memory
+
+    Patterns are counted in memory until max_patterns distinct ones are
+    held, then the counts are spilled to one of n_partitions files chosen by
+    hashing the pattern, so every count for a pattern lands in the same
+    file.  Each spill file is then merged on its own, which needs memory
+    for the distinct patterns of one partition only.
+
+    Parameters:
+    -----------
+    path : str
+        file with one string per line
+    n_partitions : int
+        number of spill files
+    max_patterns : int
+        distinct patterns held in memory before spilling
+    spill_dir : str, None
+        directory for the spill files, a temporary directory by default
+
+    Returns:
+    --------
+    num_matches : int
+        same as get_num_cipher_matches on the list of lines
+
+    """
+
+    spill_dir = tempfile.mkdtemp(prefix='decrypt-', dir=spill_dir)
+    spills = []
+    try:
+        for i in xrange(n_partitions):
+            spills.append(open(os.path.join(spill_dir, '{}.txt'.format(i)),
+                               'w'))
+
+        def spill(groups):
+            for pattern, k in groups.iteritems():
+                spills[hash(pattern) % n_partitions].write(
+                    '{}\t{}\n'.format(pattern, k))
+            groups.clear()
+
+        groups = Counter()
+        with open(path) as lines:
+            for line in lines:
+                pattern = cipher_pattern(line.rstrip('\r\n'))
+                groups[','.join(map(str, pattern))] += 1
+
+                if len(groups) >= max_patterns:
+                    spill(groups)
+
+        if not any(spill_file.tell() for spill_file in spills):
+            #-- never spilled, so the counts in memory are complete
+            return _count_pairs(groups)
+
+        spill(groups)
+        for spill_file in spills:
+            spill_file.close()
+
+        count = 0
+        for spill_file in spills:
+            merged = Counter()
+            with open(spill_file.name) as counts:
+                for line in counts:
+                    pattern, _, k = line.rpartition('\t')
+                    merged[pattern] += int(k)
+
+            count += _count_pairs(merged)
+
+        return count
+    finally:
+        for spill_file in spills:
+            spill_file.close()
+        shutil.rmtree(spill_dir)
+
+
+class CipherIndex(object):
+    """On-disk index from cipher pattern to stored strings
+
+    The index is a directory of three files:
+
+    strings : every stored string followed by a newline
+    entries : one (pattern hash, string offset, next entry) record per
+              string, each 24 bytes
+    heads : hash table of the first entry for each slot, or -1
+
+    Entries for the same slot are chained through their next field, newest
+    first, so adding a string appends a record and updates one head without
+    touching the rest of the index.  The entries and heads files are memory
+    mapped, and a query costs O(L) for the pattern plus one step for each
+    string on its chain.  The table doubles once the average chain passes
+    max_load, relinking the chains from the stored hashes without reading
+    the strings again.
+
+    Only one process should add strings at a time.
+
+    Parameters:
+    -----------
+    path : str
+        directory of the index, created if missing
+    n_slots : int
+        hash table slots for a new index
+
+    """
+
+    _record = struct.Struct('<Qqq')
+    _head = struct.Struct('<q')
+    max_load = 2
+
+    def __init__(self, path, n_slots=2**16):
+        if not os.path.isdir(path):
+            os.makedirs(path)
+
+        heads_path = os.path.join(path, 'heads')
+        if not os.path.exists(heads_path):
+            with open(heads_path, 'wb') as heads:
+                heads.write(self._head.pack(-1) * n_slots)
+
+        self.path = path
+        self._strings = open(os.path.join(path, 'strings'), 'a+b')
+        self._entries = open(os.path.join(path, 'entries'), 'a+b')
+        self._heads = open(heads_path, 'r+b')
+
+        self._heads_map = mmap.mmap(self._heads.fileno(), 0)
+        self._entries_map = None
+        self._strings_map = None
+
+    def __len__(self):
+        self._entries.seek(0, os.SEEK_END)
+        return self._entries.tell() // self._record.size
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        for mapped in [self._heads_map, self._entries_map, self._strings_map]:
+            if mapped is not None:
+                mapped.close()
+
+        for stored in [self._strings, self._entries, self._heads]:
+            stored.close()
+
+    @property
+    def n_slots(self):
+        return len(self._heads_map) // self._head.size
+
+    @staticmethod
+    def _key(string):
+        """Stable 64 bit hash of the cipher pattern of string"""
+
+        pattern = ','.join(map(str, cipher_pattern(string)))
+        return struct.unpack('<Q', hashlib.md5(pattern).digest()[:8])[0]
+
+    def _map(self, stored, mapped, size):
+        """Map stored again if mapped does not reach size bytes yet"""
+
+        if mapped is None or len(mapped) < size:
+            if mapped is not None:
+                mapped.close()
+            stored.flush()
+            mapped = mmap.mmap(stored.fileno(), 0)
+
+        return mapped
+
+    def _get_head(self, slot):
+        return self._head.unpack_from(self._heads_map,
+                                      slot * self._head.size)[0]
+
+    def _set_head(self, slot, entry):
+        self._head.pack_into(self._heads_map, slot * self._head.size, entry)
+
+    def add(self, string):
+        """Store string and return its offset in the strings file.
+
+        Raises:
+        -------
+        ValueError if string contains a newline
+
+        """
+
+        if '\n' in string:
+            raise ValueError("strings cannot contain newlines")
+
+        self._strings.seek(0, os.SEEK_END)
+        offset = self._strings.tell()
+        self._strings.write(string + '\n')
+
+        key = self._key(string)
+        entry = len(self)
+        slot = key % self.n_slots
+
+        self._entries.write(self._record.pack(key, offset,
+                                              self._get_head(slot)))
+        self._set_head(slot, entry)
+
+        if entry + 1 > self.max_load * self.n_slots:
+            self._resize(2 * self.n_slots)
+
+        return offset
+
+    def extend(self, strings):
+        """add every string, returning their offsets"""
+
+        return [self.add(string) for string in strings]
+
+    def _resize(self, n_slots):
+        """Rebuild the hash table with n_slots slots"""
+
+        n_entries = len(self)
+        self._entries_map = self._map(self._entries, self._entries_map,
+                                      n_entries * self._record.size)
+
+        self._heads_map.resize(n_slots * self._head.size)
+        self._heads_map[:] = self._head.pack(-1) * n_slots
+
+        for entry in xrange(n_entries):
+            position = entry * self._record.size
+            key, offset, _ = self._record.unpack_from(self._entries_map,
+                                                      position)
+            slot = key % n_slots
+            self._record.pack_into(self._entries_map, position, key, offset,
+                                   self._get_head(slot))
+            self._set_head(slot, entry)
+
+        self._entries_map.flush()
+        self._heads_map.flush()
+
+    def get(self, offset):
+        """Stored string starting at offset in the strings file"""
+
+        self._strings_map = self._map(self._strings, self._strings_map,
+                                      offset + 1)
+        return self._strings_map[offset:self._strings_map.find('\n', offset)]
+
+    def offsets(self, string):
+        """Offsets of stored strings that cipher-match string, newest first"""
+
+        key = self._key(string)
+        pattern = cipher_pattern(string)
+
+        entry = self._get_head(key % self.n_slots)
+        if entry >= 0:
+            self._entries_map = self._map(self._entries, self._entries_map,
+                                          len(self) * self._record.size)
+
+        offsets = []
+        while entry >= 0:
+            stored_key, offset, entry = self._record.unpack_from(
+                self._entries_map, entry * self._record.size)
+
+            if (stored_key == key and
+                    cipher_pattern(self.get(offset)) == pattern):
+                offsets.append(offset)
+
+        return offsets
+
+    def query(self, string):
+        """Stored strings that cipher-match string, newest first"""
+
+        return [self.get(offset) for offset in self.offsets(string)]
+
+    def flush(self):
+        """Write pending changes to disk"""
+
+        for stored in [self._strings, self._entries]:
+            stored.flush()
+        self._heads_map.flush()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        print count_cipher_matches_file(sys.argv[1])
+        sys.exit(0)
 
-print is_match('ABCA', 'XYZX')
-print is_match('ABCA', 'ABCD') 
-print is_match('ABCD', 'ABCA')
-print get_num_cipher_matches(['ABCA', 'XYZX', 'QWEQ', 'BEER', 'FOOBAR', 'ABBCDE'])
+    print is_match('ABCA', 'XYZX')
+    print is_match('ABCA', 'ABCD')
+    print is_match('ABCD', 'ABCA')
+    print get_num_cipher_matches(['ABCA', 'XYZX', 'QWEQ', 'BEER', 'FOOBAR', 'ABBCDE'])
@@ -0,0 +1,139 @@
+import os
+import random
+import shutil
+import tempfile
+from itertools import combinations, cycle
+
+import decrypt
+
+#-------------------------------------------------------------------------------
+
+def random_strings(n_strings, seed, alphabet='ABCD', max_length=6):
+    """Short random strings over a small alphabet, so many of them match."""
+
+    rng = random.Random(seed)
+
+    return [''.join(rng.choice(alphabet)
+                    for _ in xrange(rng.randint(0, max_length)))
+            for _ in xrange(n_strings)]
+
+#-------------------------------------------------------------------------------
+
+def test_get_num_cipher_matches():
+    strings = ['ABCA', 'XYZX', 'QWEQ', 'BEER', 'FOOBAR', 'ABBCDE']
+    assert decrypt.get_num_cipher_matches(strings) == 4, 'nope'
+    assert decrypt.get_num_cipher_matches('ABCA') == 0, 'nope'
+
+    assert decrypt.is_match('AB', 'BA'), 'nope'
+    assert not decrypt.is_match('ABCA', 'ABCD'), 'nope'
+
+    strings = random_strings(300, seed=1)
+    assert decrypt.get_num_cipher_matches(strings) == \
+        sum(decrypt.is_match(a, b) for a, b in combinations(strings, 2)), 'nope'
+
+#-------------------------------------------------------------------------------
+
+def test_count_cipher_matches_file():
+    strings = random_strings(3000, seed=2)
+    expected = decrypt.get_num_cipher_matches(strings)
+
+    spill_dir = tempfile.mkdtemp()
+    path = os.path.join(spill_dir, 'strings.txt')
+    try:
+        with open(path, 'w') as out:
+            out.write('\n'.join(strings) + '\n')
+
+        #-- small max_patterns forces many spills, max_patterns above the
+        #-- number of distinct patterns never spills
+        for n_partitions in [1, 3, 16]:
+            for max_patterns in [1, 7, 50, 10**6]:
+                assert decrypt.count_cipher_matches_file(
+                    path, n_partitions, max_patterns, spill_dir) == \
+                    expected, 'nope'
+
+        #-- spill files are cleaned up
+        assert os.listdir(spill_dir) == ['strings.txt'], 'nope'
+    finally:
+        shutil.rmtree(spill_dir)
+
+#-------------------------------------------------------------------------------
+
+def test_cipher_index():
+    strings = random_strings(2000, seed=3)
+    queries = ['ABCA', 'Q', '', 'XYZZY', 'ABAB'] + strings[:50]
+
+    def check(index, stored):
+        assert len(index) == len(stored), 'nope'
+        for query in queries:
+            assert sorted(index.query(query)) == \
+                sorted(s for s in stored if decrypt.is_match(query, s)), 'nope'
+
+    path = tempfile.mkdtemp()
+    try:
+        #-- one slot forces a resize after every few strings
+        with decrypt.CipherIndex(path, n_slots=1) as index:
+            for i, string in enumerate(strings[:200]):
+                index.add(string)
+                if not i % 40:
+                    check(index, strings[:i + 1])
+            check(index, strings[:200])
+            assert index.n_slots > 64, 'nope'
+
+        #-- reopen and append, resizing again
+        with decrypt.CipherIndex(path) as index:
+            check(index, strings[:200])
+
+            offsets = index.extend(strings[200:])
+            assert [index.get(offset) for offset in offsets] == \
+                strings[200:], 'nope'
+            check(index, strings)
+
+        with decrypt.CipherIndex(path) as index:
+            check(index, strings)
+
+            try:
+                index.add('A\nB')
+            except ValueError:
+                pass
+            else:
+                assert False, 'nope'
+    finally:
+        shutil.rmtree(path)
+
+#-------------------------------------------------------------------------------
+
+def test_iter_cipher_matches():
+    strings = random_strings(500, seed=4)
+
+    pairs = list(decrypt.iter_cipher_matches(strings))
+    assert len(pairs) == decrypt.get_num_cipher_matches(strings), 'nope'
+    assert all(decrypt.is_match(a, b) for a, b in pairs), 'nope'
+
+    groups = list(decrypt.iter_cipher_matches(strings, groups=True))
+    assert sum(len(group) * (len(group) - 1) // 2 for group in groups) == \
+        len(pairs), 'nope'
+
+    #-- pairs stream out of an endless input
+    matches = decrypt.iter_cipher_matches(cycle(['AB', 'C', 'BA']))
+    assert next(matches) == ('AB', 'BA'), 'nope'
+    assert next(matches) == ('AB', 'AB'), 'nope'
+
+#-------------------------------------------------------------------------------
+
+def test_get_num_cipher_matches_workers():
+    strings = random_strings(1000, seed=5)
+    expected = decrypt.get_num_cipher_matches(strings)
+
+    #-- shard sizes that divide the input evenly, leave a short last shard,
+    #-- or put everything in one shard
+    for chunk_size in [1, 7, 250, 5000]:
+        assert decrypt.get_num_cipher_matches(
+            strings, workers=2, chunk_size=chunk_size) == expected, 'nope'
+
+    assert decrypt.get_num_cipher_matches(
+        iter(strings), workers=2, chunk_size=33) == expected, 'nope'
+    assert decrypt.get_num_cipher_matches(
+        (string for string in strings), workers=None) == expected, 'nope'
+    assert decrypt.get_num_cipher_matches([], workers=2) == 0, 'nope'
+
+#-------------------------------------------------------------------------------
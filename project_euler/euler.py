@@ -2,9 +2,19 @@
 
 """
 
+import hashlib
+import inspect
+import multiprocessing
+import os
+import pickle
+import time
+
 import numpy as np
 import functions
 
+#-- data files, and the result cache, live next to this module
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+
 #-------------------------------------------------------------------------------
 
 def problem_1(N=1000):
@@ -33,23 +43,13 @@ def problem_2(limit=4e6):
     By considering the terms in the Fibonacci sequence whose values do not 
     exceed four million, find the sum of the even-valued terms.
 
-    """
+    limit can be a decimal string, such as '1e1000', for limits beyond the
+    range of a float.
 
-    # This could be made much faster
-    
-    sum = 0
-    iteration = 0
-    current = functions.fibonacci(iteration)
-    
-    while current < limit:
-
-        if not current % 2:
-            sum += current
+    """
 
-        iteration += 1
-        current = functions.fibonacci(iteration)
-        
-    return sum
+    return sum(term for term in functions.fibonacci_terms(limit)
+               if not term % 2)
 
 #-------------------------------------------------------------------------------
 
@@ -60,18 +60,11 @@ def problem_3(N=600851475143):
 
     """
 
-    all_factors = list(functions.factors(N))
-    
-    max_prime = 1
-    for factor in all_factors:
-        if factor > max_prime and functions.isprime(factor):
-            max_prime = factor
-
-    return max_prime
+    return max(functions.factorize(N))
 
 #-------------------------------------------------------------------------------
 
-def problem_4():
+def problem_4(digits=3):
     """A palindromic number reads the same both ways. The largest palindrome
     made from the product of two 2-digit numbers is 9009 = 91 x 99.
 
@@ -79,19 +72,11 @@ def problem_4():
     
     """
 
-    largest = 0
-
-    for val1 in xrange(100, 1000):
-        for val2 in xrange(100, 1000):
-            prod = val1 * val2
-            if (str(prod) == str(prod)[::-1]) and (prod > largest):
-                largest = prod
-
-    return largest
+    return functions.largest_palindrome_product(digits)
     
 #-------------------------------------------------------------------------------
 
-def problem_5(N=20):
+def problem_5(N=20, factored=False):
     """2520 is the smallest number that can be divided by each of the numbers 
     from 1 to 10 without any remainder.
 
@@ -100,19 +85,12 @@ def problem_5(N=20):
 
     """
     
-    out = N
-    leave = False
+    lcm, factorization = functions.lcm_range(N)
 
-    while not leave:
-        out += N
-        leave = True
+    if factored:
+        return lcm, factorization
 
-        for val in xrange(N, 1, -1):
-            if out % val:
-                leave = False
-                break
-
-    return out
+    return lcm
 
 #-------------------------------------------------------------------------------
 
@@ -138,76 +116,202 @@ def problem_7(N=10001):
 
     """
 
+    #-- p_N < N (ln N + ln ln N) for N >= 6
+    limit = 15
+    if N >= 6:
+        limit = int(N * (np.log(N) + np.log(np.log(N)))) + 1
+
     count = 0
-    value = 0
-    while count < N:
-        value += 1
+    for segment in functions.prime_segments(2, limit):
+        if count + len(segment) >= N:
+            return int(segment[N - count - 1])
 
-        if (not value % 2) and (value != 2):
-            continue
+        count += len(segment)
 
-        if functions.isprime(value):
-            count += 1
-        
-    return value
+#-------------------------------------------------------------------------------
+
+def problem_8(window=5,
+              path=os.path.join(DATA_DIR, 'problem_008_source.txt')):
+    """Find the greatest product of five consecutive digits in the
+    1000-digit number.
+
+    """
+
+    return functions.max_window_product(path, window)
 
 #-------------------------------------------------------------------------------
 
-def problem_8():
-    import operator
-    num_string = ''.join([line.strip() 
-                          for line in open('problem_008_source.txt') ])
+def problem_10(N=2E6):
+    """The sum of the primes below 10 is 2 + 3 + 5 + 7 = 17.
 
-    max_prod = 0
-    start = 0
-    end = start + 5
-    while end <= len(num_string):
-        numbers = [int(num_string[i]) for i in xrange(start, end)]
-        prod = reduce(operator.mul, numbers)
-        if prod > max_prod:
-            max_prod = prod
+    Find the sum of all the primes below two million.
 
-        start += 1
-        end += 1
+    """
 
-    return max_prod
+    return sum(int(segment.sum())
+               for segment in functions.prime_segments(2, int(N)))
 
 #-------------------------------------------------------------------------------
 
-def problem_10():
-    
-    running_sum = 2
-    for value in xrange(3, int(2E6)+1, 2):
-        if functions.isprime(value):
-            running_sum += value
+def problem_14(N=1000000):
+    """Which starting number, under one million, produces the longest
+    Collatz chain?
 
-    return running_sum
+    """
+
+    lengths = functions.collatz_lengths(N + 1)
+
+    return int(lengths.argmax())
 
 #-------------------------------------------------------------------------------
 
-def problem_14():
-    longest_len = 0
-    longest_val = 0
+CACHE_DIR = os.path.join(DATA_DIR, '.euler_cache')
+
+def _cache_key(problem):
+    """Hash of a problem's source, its default arguments and functions.py.
+
+    Editing the problem, its defaults or the shared helpers gives a new key,
+    and so does changing the size or modification time of a data file named
+    by a default argument.
+
+    """
 
-    for starting in xrange(1, 1000001):
-        sequence = functions.collatz(starting)
-        if len(sequence) > longest_len:
-            longest_len = len(sequence)
-            longest_val = starting
+    func = globals()[problem]
+    defaults = inspect.getargspec(func).defaults or ()
 
-    return longest_val
+    key = hashlib.sha1()
+    key.update(inspect.getsource(func).encode('utf-8'))
+    key.update(repr(defaults).encode('utf-8'))
+    key.update(inspect.getsource(functions).encode('utf-8'))
+
+    for default in defaults:
+        if isinstance(default, basestring) and os.path.isfile(default):
+            stat = os.stat(default)
+            key.update('{} {!r}'.format(stat.st_size, stat.st_mtime))
+
+    return key.hexdigest()
 
 #-------------------------------------------------------------------------------
 
-if __name__ == "__main__":
+def _run_problem(problem):
+    """Solve one problem and return (problem, result, wall time)."""
+
+    start = time.time()
+    result = globals()[problem]()
+
+    return problem, result, time.time() - start
+
+#-------------------------------------------------------------------------------
+
+def run_problems(problems, workers=None, cache_dir=CACHE_DIR, spf_limit=None):
+    """Solve the selected problems in a process pool, caching the results.
+
+    Results are pickled to cache_dir under a key from _cache_key, so a
+    problem whose code has not changed is answered from disk.
+
+    Parameters:
+    -----------
+    problems : list
+        problem numbers to solve
+    workers : int, None
+        number of worker processes, defaults to the number of CPUs
+    cache_dir : str, None
+        directory for cached results.  None disables the cache.
+    spf_limit : int, None
+        load the smallest-prime-factor table up to this value before the
+        workers fork, so they all share the one memory-mapped copy
+
+    Returns:
+    --------
+    results : generator
+        (problem, result, wall time, cached) tuples, in the order given
+
     """
-    print "Problem 1: ", problem_1()
-    print "Problem 2: ", problem_2()
-    print "Problem 3: ", problem_3()
-    print "Problem 4: ", problem_4()
-    print "Problem 5: ", problem_5()
-    print "Problem 6: ", problem_6()
-    print "Problem 7: ", problem_7()
-    print "Problem 8: ", problem_8()  
-    print "Problem 10: ", problem_10()"""
-    print "Problem 14: ", problem_14()
+
+    names = ['problem_{}'.format(number) for number in problems]
+    for name in names:
+        if not callable(globals().get(name)):
+            raise ValueError('{} is not defined'.format(name))
+
+    if cache_dir and not os.path.isdir(cache_dir):
+        os.makedirs(cache_dir)
+
+    cached = {}
+    paths = {}
+    for name in names:
+        if not cache_dir:
+            continue
+
+        paths[name] = os.path.join(cache_dir, '{}-{}.pkl'.format(
+            name, _cache_key(name)))
+
+        if os.path.exists(paths[name]):
+            with open(paths[name], 'rb') as cache_file:
+                cached[name] = pickle.load(cache_file)
+
+    to_run = [name for name in names if not name in cached]
+
+    if spf_limit and to_run:
+        functions.load_spf_table(spf_limit)
+
+    pool = multiprocessing.Pool(workers) if len(to_run) > 1 else None
+    try:
+        if pool:
+            solved = pool.imap(_run_problem, to_run)
+        else:
+            solved = (_run_problem(name) for name in to_run)
+        solved = iter(solved)
+
+        for name in names:
+            if name in cached:
+                result, wall_time = cached[name]
+                yield name, result, wall_time, True
+                continue
+
+            _, result, wall_time = next(solved)
+
+            if cache_dir:
+                with open(paths[name], 'wb') as cache_file:
+                    pickle.dump((result, wall_time), cache_file)
+
+            yield name, result, wall_time, False
+
+    finally:
+        if pool:
+            pool.terminate()
+            pool.join()
+
+#-------------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    import argparse
+
+    all_problems = sorted(int(name.split('_')[1]) for name in globals()
+                          if name.startswith('problem_'))
+
+    parser = argparse.ArgumentParser(description='Solve Project Euler problems')
+    parser.add_argument('problems', nargs='*', type=int, default=all_problems,
+                        help='problem numbers to run, defaults to all')
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help='number of worker processes')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='ignore and do not write cached results')
+    parser.add_argument('--spf-limit', type=int, default=None,
+                        help='share a smallest-prime-factor table up to this '
+                             'value with the workers')
+    args = parser.parse_args()
+
+    unknown = sorted(set(args.problems) - set(all_problems))
+    if unknown:
+        parser.error('no such problems: {}'.format(unknown))
+
+    cache_dir = None if args.no_cache else CACHE_DIR
+
+    for name, result, wall_time, cached in run_problems(args.problems,
+                                                        args.workers,
+                                                        cache_dir,
+                                                        args.spf_limit):
+        print "Problem {}: {} ({:.3f} s{})".format(name.split('_')[1],
+                                                  result,
+                                                  wall_time,
+                                                  ', cached' if cached else '')
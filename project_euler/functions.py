@@ -1,37 +1,772 @@
 """ Quick needed mathematical functions
 
 """
+import os
+from decimal import Decimal, InvalidOperation, ROUND_CEILING
+from fractions import gcd
+
 import numpy as np
 
 #-------------------------------------------------------------------------------
 
 def fibonacci(n):
-    if n == 0: 
-        return 0
-    elif n == 1: 
-        return 1
-    else: 
-        return fibonacci(n-1) + fibonacci(n-2)
+    """The n-th Fibonacci number, exact for arbitrarily large n.
+
+    Uses fast doubling, F(2k) = F(k) * (2 F(k+1) - F(k)) and
+    F(2k+1) = F(k)^2 + F(k+1)^2, so only O(log n) steps are needed.
+
+    """
+
+    if n < 0:
+        raise ValueError('input value must be non-negative')
+
+    a, b = 0, 1
+    for bit in bin(int(n))[2:]:
+        a, b = a * (2 * b - a), a * a + b * b
+        if bit == '1':
+            a, b = b, a + b
+
+    return a
 
 #-------------------------------------------------------------------------------
 
+def fibonacci_terms(limit):
+    """Stream the Fibonacci numbers, starting from F(0), that are below limit.
+
+    Each term costs one addition.  limit may be a number or a decimal string
+    such as '1e1000', which is too large for a float.
+
+    Raises:
+    -------
+    ValueError if limit is not a finite number
+
+    """
+
+    try:
+        limit = Decimal(limit)
+    except (InvalidOperation, TypeError):
+        raise ValueError('limit must be a number, got {!r}'.format(limit))
+
+    if not limit.is_finite():
+        raise ValueError('limit must be finite, got {}'.format(limit))
+
+    #-- an integer term is below limit exactly when it is below its ceiling
+    limit = int(limit.to_integral_value(rounding=ROUND_CEILING))
+
+    return _fibonacci_below(limit)
+
+def _fibonacci_below(limit):
+    """Generator behind fibonacci_terms, for an int limit."""
+
+    a, b = 0, 1
+    while a < limit:
+        yield a
+        a, b = b, a + b
+
+#-------------------------------------------------------------------------------
+
+SMALL_PRIME_LIMIT = 2 ** 20
+_SMALL_PRIME_BITS = None
+
+def _small_prime_bits():
+    """Bit-packed primality flags for every value below SMALL_PRIME_LIMIT."""
+
+    global _SMALL_PRIME_BITS
+    if _SMALL_PRIME_BITS is None:
+        flags = np.zeros(SMALL_PRIME_LIMIT, dtype=bool)
+        flags[_small_primes(SMALL_PRIME_LIMIT - 1)] = True
+        _SMALL_PRIME_BITS = np.packbits(flags)
+
+    return _SMALL_PRIME_BITS
+
+#-------------------------------------------------------------------------------
+
+#-- primes below 100, which rule out most composites with one division each
+_SCREEN_PRIMES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41, 43, 47, 53,
+                  59, 61, 67, 71, 73, 79, 83, 89, 97)
+
 def isprime(number):
-    if number == 2:
-        return True
-    if number < 2 or not number % 2:
+    """Deterministic primality test.
+
+    Values below SMALL_PRIME_LIMIT are always looked up in a bitmap.  From
+    there up to the size of the smallest-prime-factor table, when one is
+    loaded, they are looked up in the table.  Anything larger is trial
+    divided by the primes below 100, then goes through Miller-Rabin, which
+    is exact for every 64-bit value.
+
+    """
+
+    number = int(number)
+
+    if number < 2:
         return False
-    
-    for value in xrange(3, int(np.sqrt(number))+1, 2):
-        if not number % value:
+    if number < SMALL_PRIME_LIMIT:
+        return bool(_small_prime_bits()[number >> 3] >> (7 - (number & 7)) & 1)
+    if _SPF_TABLE is not None and number < len(_SPF_TABLE):
+        return int(_SPF_TABLE[number]) == number
+
+    #-- cheap screen, as in isprime_many, before Miller-Rabin
+    for p in _SCREEN_PRIMES:
+        if not number % p:
+            return False
+
+    return _miller_rabin(number)
+
+#-------------------------------------------------------------------------------
+
+def isprime_many(numbers):
+    """Vectorized isprime over an array of non-negative 64-bit values.
+
+    Small values are answered from the bitmap in one step, and larger ones
+    are screened by the odd primes below 100 before any Miller-Rabin test.
+
+    Parameters:
+    -----------
+    numbers : array_like
+        integer values to test
+
+    Returns:
+    --------
+    is_prime : np.ndarray
+        bool array with the same shape as numbers
+
+    """
+
+    numbers = np.asarray(numbers, dtype=np.uint64)
+    is_prime = np.zeros(numbers.shape, dtype=bool)
+
+    small = numbers < SMALL_PRIME_LIMIT
+    values = numbers[small].astype(np.int64)
+    bits = _small_prime_bits()[values >> 3] >> (7 - (values & 7)) & 1
+    is_prime[small] = bits.astype(bool)
+
+    index = np.flatnonzero(~small & (numbers % 2 == 1))
+    for p in _SCREEN_PRIMES[1:]:
+        index = index[numbers.flat[index] % np.uint64(p) != 0]
+
+    for i in index:
+        is_prime.flat[i] = _miller_rabin(int(numbers.flat[i]))
+
+    return is_prime
+
+#-------------------------------------------------------------------------------
+
+SEGMENT_SIZE = 2 ** 18
+
+def _small_primes(limit):
+    """Simple odd-only sieve of all primes <= limit.
+
+    Used to seed the segmented sieve, so limit is at most ~sqrt(stop).
+
+    """
+
+    if limit < 2:
+        return np.array([], dtype=np.int64)
+
+    #-- index i represents the odd number 2*i + 1
+    is_prime = np.ones(limit // 2 + 1, dtype=bool)
+    is_prime[0] = False
+
+    for i in xrange(1, int(np.sqrt(limit)) // 2 + 1):
+        if is_prime[i]:
+            p = 2 * i + 1
+            is_prime[p * p // 2::p] = False
+
+    odd_primes = 2 * np.flatnonzero(is_prime).astype(np.int64) + 1
+    odd_primes = odd_primes[odd_primes <= limit]
+
+    return np.concatenate(([2], odd_primes)).astype(np.int64)
+
+#-------------------------------------------------------------------------------
+
+def prime_segments(start, stop, segment_size=SEGMENT_SIZE):
+    """Stream the primes in [start, stop) one sieve segment at a time.
+
+    Only odd numbers are stored, and each segment holds at most segment_size
+    of them, so memory is bounded by segment_size plus the seeding primes
+    below sqrt(stop) no matter how large the range is.
+
+    Parameters:
+    -----------
+    start : int
+        smallest value to consider
+    stop : int
+        values up to, but not including, stop are considered
+    segment_size : int
+        number of odd values sieved per segment
+
+    Returns:
+    --------
+    segments : generator
+        numpy int64 arrays of the primes in each consecutive segment
+
+    """
+
+    start = max(int(start), 2)
+    stop = int(stop)
+
+    if stop <= start:
+        return
+
+    if start == 2:
+        yield np.array([2], dtype=np.int64)
+        start = 3
+
+    base_primes = _small_primes(int(np.sqrt(stop)) + 1)[1:].tolist()
+
+    #-- segments always begin on an odd value
+    low = start | 1
+    while low < stop:
+        high = min(low + 2 * segment_size, stop)
+        segment = np.ones((high - low + 1) // 2, dtype=bool)
+
+        for p in base_primes:
+            if p * p >= high:
+                break
+
+            first = max(p * p, -(-low // p) * p)
+            if not first % 2:
+                first += p
+
+            segment[(first - low) // 2::p] = False
+
+        yield low + 2 * np.flatnonzero(segment).astype(np.int64)
+
+        low = high | 1
+
+#-------------------------------------------------------------------------------
+
+def primes(start, stop, segment_size=SEGMENT_SIZE):
+    """All primes in [start, stop) as a single numpy array.
+
+    See prime_segments for the streaming version.
+
+    """
+
+    segments = list(prime_segments(start, stop, segment_size))
+
+    if not segments:
+        return np.array([], dtype=np.int64)
+
+    return np.concatenate(segments)
+
+#-------------------------------------------------------------------------------
+
+#-- witness sets that make Miller-Rabin exact below each bound: the first
+#-- 13 primes up to 3.3e24, and Jaeschke's and Sinclair's shorter sets below
+#-- 3.2e9 and 2**64
+_WITNESSES = ((3215031751, (2, 3, 5, 7)),
+              (2 ** 64, (2, 325, 9375, 28178, 450775, 9780504, 1795265022)),
+              (3317044064679887385961981,
+               (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)))
+
+def _miller_rabin(n):
+    """Miller-Rabin test of an odd n > 41 against fixed witnesses.
+
+    Deterministic for all n < 3.3e24, which covers every 64-bit value, with
+    the fewest witnesses known to suffice for the size of n.
+
+    """
+
+    witnesses = next((bases for bound, bases in _WITNESSES if n < bound),
+                     _WITNESSES[-1][1])
+
+    d = n - 1
+    s = 0
+    while not d % 2:
+        d //= 2
+        s += 1
+
+    for a in witnesses:
+        a %= n
+        if not a:
+            continue
+
+        x = pow(a, d, n)
+        if x == 1 or x == n - 1:
+            continue
+
+        for _ in xrange(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
             return False
 
     return True
 
 #-------------------------------------------------------------------------------
 
-def factors(n):    
-    return set(reduce(list.__add__, 
-                ([i, n//i] for i in range(1, int(n**0.5) + 1) if n % i == 0)))
+def _pollard_rho(n):
+    """Find a non-trivial factor of the odd composite n (Brent's variant)."""
+
+    c = 1
+    while True:
+        y, r, q = 2, 1, 1
+        g = 1
+        while g == 1:
+            x = y
+            for _ in xrange(r):
+                y = (y * y + c) % n
+
+            k = 0
+            while k < r and g == 1:
+                ys = y
+                for _ in xrange(min(128, r - k)):
+                    y = (y * y + c) % n
+                    q = q * abs(x - y) % n
+                g = gcd(q, n)
+                k += 128
+            r *= 2
+
+        #-- the batched product overshot, so step back one at a time
+        if g == n:
+            g = 1
+            while g == 1:
+                ys = (ys * ys + c) % n
+                g = gcd(abs(x - ys), n)
+
+        if g != n:
+            return g
+
+        c += 1
+
+#-------------------------------------------------------------------------------
+
+SPF_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        'spf_table.npy')
+_SPF_TABLE = None
+
+def load_spf_table(limit, path=SPF_PATH):
+    """Open the smallest-prime-factor table, building it if needed.
+
+    The table is saved as a .npy file and opened memory-mapped, so later
+    runs and worker processes share it without recomputing it.  Once
+    loaded, isprime, factorize, factors, totient and num_divisors answer
+    every value below the table size from it in O(log n).
+
+    Parameters:
+    -----------
+    limit : int
+        the table must cover every value below limit
+    path : str, None
+        location of the .npy file.  None keeps the table in memory only.
+
+    Returns:
+    --------
+    spf : np.ndarray
+        spf[n] is the smallest prime factor of n, for 2 <= n < len(spf)
+
+    """
+
+    global _SPF_TABLE
+
+    limit = int(limit)
+    if _SPF_TABLE is not None and len(_SPF_TABLE) >= limit:
+        return _SPF_TABLE
+
+    if path and os.path.exists(path):
+        spf = np.load(path, mmap_mode='r')
+        if len(spf) >= limit:
+            _SPF_TABLE = spf
+            return spf
+
+    spf = np.zeros(max(limit, 2), dtype=np.uint32)
+    for p in _small_primes(int(np.sqrt(limit))).tolist():
+        multiples = spf[p * p::p]
+        multiples[multiples == 0] = p
+
+    unset = np.flatnonzero(spf == 0)
+    spf[unset] = unset
+    spf[:2] = 0
+
+    if path:
+        #-- write then rename so other processes never see a partial file
+        partial = '{}.{}.tmp'.format(path, os.getpid())
+        with open(partial, 'wb') as out:
+            np.save(out, spf)
+        os.rename(partial, path)
+        spf = np.load(path, mmap_mode='r')
+
+    _SPF_TABLE = spf
+
+    return spf
+
+#-------------------------------------------------------------------------------
+
+_TRIAL_PRIMES = None
+
+def factorize(n):
+    """Prime factorization of n.
+
+    Small factors are removed by trial division by the primes below 1000,
+    and whatever remains is split with Pollard rho until every piece passes
+    a Miller-Rabin test.
+
+    Parameters:
+    -----------
+    n : int
+        positive value to factor
+
+    Returns:
+    --------
+    factorization : dict
+        prime : exponent pairs; empty for n == 1
+
+    """
+
+    global _TRIAL_PRIMES
+    if _TRIAL_PRIMES is None:
+        _TRIAL_PRIMES = primes(2, 1000).tolist()
+
+    n = int(n)
+    if not n > 0:
+        raise ValueError('input value must be positive')
+
+    factorization = {}
+
+    if _SPF_TABLE is not None and n < len(_SPF_TABLE):
+        while n > 1:
+            p = int(_SPF_TABLE[n])
+            factorization[p] = factorization.get(p, 0) + 1
+            n //= p
+
+        return factorization
+
+    for p in _TRIAL_PRIMES:
+        if p * p > n:
+            break
+
+        while not n % p:
+            factorization[p] = factorization.get(p, 0) + 1
+            n //= p
+
+    remaining = [n] if n > 1 else []
+    while remaining:
+        value = remaining.pop()
+
+        if value < 1000 ** 2 or _miller_rabin(value):
+            factorization[value] = factorization.get(value, 0) + 1
+        else:
+            divisor = _pollard_rho(value)
+            remaining.extend([divisor, value // divisor])
+
+    return factorization
+
+#-------------------------------------------------------------------------------
+
+def factors(n):
+    """All divisors of n, built from its prime factorization."""
+
+    divisors = [1]
+    for prime, exponent in factorize(n).items():
+        divisors = [d * prime ** k for d in divisors
+                                    for k in xrange(exponent + 1)]
+
+    return set(divisors)
+
+#-------------------------------------------------------------------------------
+
+def _product(values):
+    """Exact product of a list of ints, multiplied as a balanced tree.
+
+    Keeps the big-int operands similar in size, which is much faster than
+    a running product when the result has many digits.
+
+    """
+
+    values = list(values)
+    if not values:
+        return 1
+
+    while len(values) > 1:
+        paired = [values[i] * values[i + 1]
+                  for i in xrange(0, len(values) - 1, 2)]
+        if len(values) % 2:
+            paired.append(values[-1])
+        values = paired
+
+    return values[0]
+
+#-------------------------------------------------------------------------------
+
+def lcm_range(N):
+    """Least common multiple of 1, 2, ..., N.
+
+    The LCM is the product of the largest power of each prime p <= N that
+    does not exceed N.
+
+    Parameters:
+    -----------
+    N : int
+        upper end of the range
+
+    Returns:
+    --------
+    lcm : int
+        the exact least common multiple
+    factorization : dict
+        prime : exponent pairs of lcm
+
+    """
+
+    factorization = {}
+    for p in primes(2, int(N) + 1).tolist():
+        exponent = 1
+        power = p
+        while power * p <= N:
+            power *= p
+            exponent += 1
+
+        factorization[p] = exponent
+
+    lcm = _product(p ** k for p, k in sorted(factorization.items()))
+
+    return lcm, factorization
+
+#-------------------------------------------------------------------------------
+
+def totient(n):
+    """Euler's totient of n, from its prime factorization."""
+
+    result = int(n)
+    for prime in factorize(n):
+        result -= result // prime
+
+    return result
+
+#-------------------------------------------------------------------------------
+
+def num_divisors(n):
+    """Number of divisors of n, from its prime factorization."""
+
+    count = 1
+    for exponent in factorize(n).values():
+        count *= exponent + 1
+
+    return count
+
+#-------------------------------------------------------------------------------
+
+def is_palindrome(values):
+    """Vectorized check for non-negative integers that read the same reversed.
+
+    The digits are reversed arithmetically, without converting to strings.
+
+    """
+
+    values = np.asarray(values, dtype=np.int64)
+
+    reverse = np.zeros_like(values)
+    remaining = values.copy()
+    while remaining.any():
+        left = remaining > 0
+        reverse = np.where(left, reverse * 10 + remaining % 10, reverse)
+        remaining //= 10
+
+    return reverse == values
+
+#-------------------------------------------------------------------------------
+
+def largest_palindrome_product(digits, tile_size=1024):
+    """Largest palindrome that is a product of two digits-digit numbers.
+
+    Products are formed as numpy outer products over tiles of the upper
+    triangle (second factor <= first), walked from the largest factors down.
+    A tile is skipped once its largest possible product cannot beat the best
+    palindrome found so far, which ends the search after a few tiles.
+
+    Parameters:
+    -----------
+    digits : int
+        number of digits in each factor
+    tile_size : int
+        number of factors along each side of a tile
+
+    Returns:
+    --------
+    palindrome : int
+        the largest palindromic product, or 0 if there is none
+
+    """
+
+    low = 10 ** (digits - 1)
+    high = 10 ** digits - 1
+
+    best = 0
+    for row_top in xrange(high, low - 1, -tile_size):
+        if row_top * row_top <= best:
+            break
+
+        rows = np.arange(row_top, max(row_top - tile_size, low - 1), -1,
+                         dtype=np.int64)
+
+        for col_top in xrange(row_top, low - 1, -tile_size):
+            if row_top * col_top <= best:
+                break
+
+            cols = np.arange(col_top, max(col_top - tile_size, low - 1), -1,
+                             dtype=np.int64)
+
+            products = np.outer(rows, cols)
+            candidates = products[(cols[None, :] <= rows[:, None]) &
+                                  (products > best)]
+
+            found = candidates[is_palindrome(candidates)]
+            if len(found):
+                best = int(found.max())
+
+    return best
+
+#-------------------------------------------------------------------------------
+
+#-- exponents of 2, 3, 5 and 7 in each digit, which fix a product exactly
+_DIGIT_EXPONENTS = np.array([[0, 0, 1, 0, 2, 0, 1, 0, 3, 0],
+                             [0, 0, 0, 1, 0, 0, 1, 0, 0, 2],
+                             [0, 0, 0, 0, 0, 1, 0, 0, 0, 0],
+                             [0, 0, 0, 0, 0, 0, 0, 1, 0, 0]], dtype=np.int64)
+
+def _exponent_packing(window):
+    """Pack the exponents of 2, 3, 5 and 7 of a window into int64 keys.
+
+    Each digit gets a weight per key that holds its exponents in mixed
+    radix, so summing the weights over a window packs the window's exponents
+    the same way, and two windows have equal keys only if their products are
+    equal.  The exponents share one key unless that could overflow int64,
+    as it can for windows of tens of thousands of digits.
+
+    Returns:
+    --------
+    packing : list of tuples
+        (rows of _DIGIT_EXPONENTS, their radices, int64 digit weights) for
+        each key
+
+    """
+
+    limits = [3 * window, 2 * window, window, window]
+
+    groups = [[]]
+    size = 1
+    for row, limit in enumerate(limits):
+        if groups[-1] and size * (limit + 1) >= 2 ** 63:
+            groups.append([])
+            size = 1
+        groups[-1].append(row)
+        size *= limit + 1
+
+    packing = []
+    for rows in groups:
+        radices = [limits[row] + 1 for row in rows]
+        places = [1]
+        for radix in reversed(radices[1:]):
+            places.insert(0, places[0] * radix)
+
+        weights = np.array(places, dtype=np.int64).dot(_DIGIT_EXPONENTS[rows])
+        packing.append((rows, radices, weights))
+
+    return packing
+
+def _unpack_exponents(keys, packing):
+    """Exponents of 2, 3, 5 and 7 from keys packed by _exponent_packing."""
+
+    exponents = [0] * 4
+    for key, (rows, radices, _) in zip(keys, packing):
+        for row, radix in reversed(zip(rows, radices)):
+            key, exponents[row] = divmod(key, radix)
+
+    return exponents
+
+def max_window_product(path, window, block_size=2 ** 18):
+    """Largest product of window adjacent digits in a text file of digits.
+
+    The file is memory-mapped and read one block at a time, keeping only the
+    last window - 1 digits between blocks, so memory use is a small multiple
+    of block_size whatever the file size.  Any non-digit bytes, such as
+    newlines, are skipped.
+
+    Within a block, windows containing a zero are found from a running count
+    of zeros, and the rest are ranked by a sum of log digits.  Only the
+    windows that tie with the best log sum, and could beat the best product
+    of earlier blocks, are multiplied out exactly, once for each distinct
+    set of prime exponents.  Those exponents are packed into integer keys,
+    so a window's exponents come from a running sum rather than its digits.
+
+    Parameters:
+    -----------
+    path : str
+        file of decimal digits
+    window : int
+        number of adjacent digits in each product
+    block_size : int
+        number of bytes read from the file at a time
+
+    Returns:
+    --------
+    max_prod : int
+        the largest product, or 0 if the file has fewer than window digits
+
+    """
+
+    if not os.path.getsize(path):
+        return 0
+
+    raw = np.memmap(path, dtype=np.uint8, mode='r')
+    log_digits = np.log(np.maximum(np.arange(10), 1))
+
+    packing = _exponent_packing(window)
+
+    max_prod = 0
+    max_log = -np.inf
+    carry = np.array([], dtype=np.uint8)
+    for start in xrange(0, len(raw), block_size):
+        block = raw[start:start + block_size]
+        block = block[(block >= ord('0')) & (block <= ord('9'))]
+
+        digits = np.concatenate((carry, block - np.uint8(ord('0'))))
+        carry = digits[-(window - 1):] if window > 1 else digits[:0]
+
+        if len(digits) < window:
+            continue
+
+        zeros = np.concatenate(([0], np.cumsum(digits == 0, dtype=np.int32)))
+        logs = np.concatenate(([0], np.cumsum(log_digits[digits])))
+
+        window_zeros = zeros[window:] - zeros[:-window]
+        window_logs = logs[window:] - logs[:-window]
+        window_logs[window_zeros > 0] = -np.inf
+
+        #-- nothing in this block can beat the best product so far
+        best = window_logs.max()
+        if best == -np.inf or best < max_log - 1e-6:
+            continue
+
+        candidates = np.flatnonzero(window_logs >= best - 1e-6)
+
+        #-- packed exponents of the candidates from running sums, with one
+        #-- copy of each distinct set
+        keys = []
+        for _, _, weights in packing:
+            sums = np.concatenate(([0], np.cumsum(weights[digits])))
+            keys.append(sums[candidates + window] - sums[candidates])
+
+        if len(keys) == 1:
+            keys = np.unique(keys[0])[np.newaxis]
+        else:
+            keys = np.column_stack(keys)[np.lexsort(keys[::-1])]
+            distinct = np.ones(len(keys), dtype=bool)
+            distinct[1:] = (keys[1:] != keys[:-1]).any(axis=1)
+            keys = keys[distinct].T
+
+        exponents = [_unpack_exponents(window_keys, packing)
+                     for window_keys in zip(*keys.tolist())]
+
+        for two, three, five, seven in exponents:
+            prod = 2 ** two * 3 ** three * 5 ** five * 7 ** seven
+            max_prod = max(max_prod, prod)
+
+        max_log = max(max_log, best)
+
+    return max_prod
 
 #-------------------------------------------------------------------------------
 
@@ -44,7 +779,7 @@ def collatz(start):
     
     while start != 1:
         if not start % 2:
-            start /= 2
+            start //= 2
         else:
             start = (3 * start) + 1
         
@@ -53,3 +788,96 @@ def collatz(start):
     return sequence
 
 #-------------------------------------------------------------------------------
+
+def collatz_length(start, cache=None):
+    """Number of terms in the Collatz sequence from start, without building it.
+
+    Equivalent to len(collatz(start)).
+
+    Parameters:
+    -----------
+    start : int
+        first value of the sequence
+    cache : np.ndarray, optional
+        known lengths indexed by start value, as returned by collatz_lengths.
+        Zero entries are treated as unknown.
+
+    Returns:
+    --------
+    length : int
+        number of terms, including start and the final 1
+
+    """
+
+    if not start > 0:
+        raise ValueError('input value must be larger than 1')
+
+    size = 0 if cache is None else len(cache)
+
+    steps = 0
+    value = start
+    while value != 1:
+        if value < size and cache[value]:
+            return steps + int(cache[value])
+
+        if not value % 2:
+            value //= 2
+        else:
+            value = 3 * value + 1
+
+        steps += 1
+
+    return steps + 1
+
+#-------------------------------------------------------------------------------
+
+def collatz_lengths(limit, block_size=2 ** 16):
+    """Collatz sequence lengths for every start value below limit.
+
+    Start values are advanced together as numpy arrays, one block at a time.
+    Each block only runs until its values fall below the start of the block,
+    where the lengths are already known from earlier blocks.
+
+    Parameters:
+    -----------
+    limit : int
+        lengths are found for 1 <= start < limit
+    block_size : int
+        number of start values advanced together
+
+    Returns:
+    --------
+    lengths : np.ndarray
+        lengths[start] == len(collatz(start)); lengths[0] is 0
+
+    """
+
+    limit = int(limit)
+    lengths = np.zeros(max(limit, 2), dtype=np.int32)
+    lengths[1] = 1
+
+    for low in xrange(2, limit, block_size):
+        high = min(low + block_size, limit)
+
+        index = np.arange(low, high, dtype=np.int64)
+        values = index.copy()
+        steps = np.zeros(len(index), dtype=np.int32)
+
+        while len(index):
+            odd = (values & 1).astype(bool)
+
+            #-- an odd step is always followed by an even one
+            values = np.where(odd, (3 * values + 1) >> 1, values >> 1)
+            steps += 1 + odd
+
+            done = values < low
+            lengths[index[done]] = steps[done] + lengths[values[done]]
+
+            keep = ~done
+            index = index[keep]
+            values = values[keep]
+            steps = steps[keep]
+
+    return lengths[:limit]
+
+#-------------------------------------------------------------------------------
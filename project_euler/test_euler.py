@@ -0,0 +1,15 @@
+import euler
+import functions
+
+#-------------------------------------------------------------------------------
+
+def test_problem_7():
+    primes = functions.primes(0, 2000).tolist()
+
+    for N in xrange(1, 300):
+        assert euler.problem_7(N) == primes[N - 1], 'nope'
+
+    assert euler.problem_7(6) == 13, 'nope'
+    assert euler.problem_7() == 104743, 'nope'
+
+#-------------------------------------------------------------------------------
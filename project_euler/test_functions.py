@@ -0,0 +1,188 @@
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+import functions
+
+#-------------------------------------------------------------------------------
+
+def brute_factors(n):
+    """Divisors of n by trial division, for checking factors."""
+
+    return set(d for d in xrange(1, n + 1) if not n % d)
+
+def brute_isprime(n):
+    """Primality by trial division, for checking isprime."""
+
+    return n > 1 and all(n % d for d in xrange(2, int(n ** 0.5) + 1))
+
+def check_factorization(n, factorization):
+    """factorization multiplies back to n and holds only primes."""
+
+    product = 1
+    for prime, exponent in factorization.items():
+        assert exponent > 0, 'nope'
+        assert functions.isprime(prime), 'nope'
+        product *= prime ** exponent
+
+    assert product == n, 'nope'
+
+#-------------------------------------------------------------------------------
+
+def test_factorize():
+    assert functions.factorize(1) == {}, 'nope'
+
+    for n in xrange(1, 5000):
+        check_factorization(n, functions.factorize(n))
+
+    #-- prime squares and cubes defeat trial division and are the worst case
+    #-- for Pollard rho
+    assert functions.factorize((2 ** 31 - 1) ** 2) == {2 ** 31 - 1: 2}, 'nope'
+    assert functions.factorize(99991 ** 3) == {99991: 3}, 'nope'
+    assert functions.factorize(1000003 ** 2) == {1000003: 2}, 'nope'
+
+    assert functions.factorize(2 ** 64 - 1) == \
+        {3: 1, 5: 1, 17: 1, 257: 1, 641: 1, 65537: 1, 6700417: 1}, 'nope'
+
+    #-- a 64-bit prime times a small prime, and a product of two large primes
+    assert functions.factorize(3 * (2 ** 64 - 59)) == \
+        {3: 1, 2 ** 64 - 59: 1}, 'nope'
+    assert functions.factorize(1000003 * 999983) == \
+        {1000003: 1, 999983: 1}, 'nope'
+    assert functions.factorize(2 ** 61 - 1) == {2 ** 61 - 1: 1}, 'nope'
+
+    for n in [0, -12]:
+        try:
+            functions.factorize(n)
+        except ValueError:
+            pass
+        else:
+            assert False, 'nope'
+
+#-------------------------------------------------------------------------------
+
+def test_factors():
+    for n in xrange(1, 1000):
+        assert functions.factors(n) == brute_factors(n), 'nope'
+
+    assert functions.factors(2 ** 10 * 3 ** 2) == \
+        set(2 ** i * 3 ** j for i in xrange(11) for j in xrange(3)), 'nope'
+
+#-------------------------------------------------------------------------------
+
+def test_isprime():
+    for n in xrange(-5, 2000):
+        assert functions.isprime(n) == brute_isprime(n), 'nope'
+
+    #-- either side of the bitmap boundary
+    limit = functions.SMALL_PRIME_LIMIT
+    for n in xrange(limit - 50, limit + 50):
+        assert functions.isprime(n) == brute_isprime(n), 'nope'
+    assert functions.isprime(1048573) and functions.isprime(1048583), 'nope'
+
+    #-- strong pseudoprimes to the first 4, 9 and 12 prime bases
+    for n in [3215031751, 3825123056546413051, 318665857834031151167461]:
+        assert not functions.isprime(n), 'nope'
+        assert not functions._miller_rabin(n), 'nope'
+
+    #-- the largest primes below 2**64, and their composite neighbours
+    for n in [2 ** 64 - 59, 2 ** 64 - 83, 2 ** 64 - 95]:
+        assert functions.isprime(n), 'nope'
+    for n in [2 ** 64 - 1, 2 ** 64 - 57, 2 ** 64 - 61, (2 ** 32 - 5) ** 2]:
+        assert not functions.isprime(n), 'nope'
+
+#-------------------------------------------------------------------------------
+
+def test_isprime_many():
+    rng = np.random.RandomState(5)
+    limit = functions.SMALL_PRIME_LIMIT
+
+    numbers = np.concatenate([
+        np.arange(0, 3000),
+        np.arange(limit - 100, limit + 100),
+        rng.randint(0, 2 ** 62, 2000).astype(np.uint64) * 4 + 1,
+        np.array([2 ** 64 - 59, 2 ** 64 - 1, 3825123056546413051],
+                 dtype=np.uint64)]).astype(np.uint64)
+
+    assert functions.isprime_many(numbers).tolist() == \
+        [functions.isprime(n) for n in numbers.tolist()], 'nope'
+
+    #-- shape is kept
+    assert functions.isprime_many(np.arange(12).reshape(3, 4)).tolist() == \
+        [[False, False, True, True], [False, True, False, True],
+         [False, False, False, True]], 'nope'
+
+#-------------------------------------------------------------------------------
+
+def test_spf_table():
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'spf.npy')
+    try:
+        spf = functions.load_spf_table(1000, path)
+        assert os.listdir(directory) == ['spf.npy'], 'nope'
+        assert isinstance(spf, np.memmap) and len(spf) == 1000, 'nope'
+        assert spf[0] == spf[1] == 0, 'nope'
+        assert all(spf[n] == min(d for d in xrange(2, n + 1) if not n % d)
+                   for n in xrange(2, 1000)), 'nope'
+
+        #-- a loaded table that is large enough is reused, and a saved one
+        #-- is reloaded from the file
+        assert functions.load_spf_table(500, path) is spf, 'nope'
+        functions._SPF_TABLE = None
+        reloaded = functions.load_spf_table(800, path)
+        assert isinstance(reloaded, np.memmap) and len(reloaded) == 1000, \
+            'nope'
+
+        #-- a table that is too small is rebuilt and replaces the file
+        limit = functions.SMALL_PRIME_LIMIT + 5000
+        spf = functions.load_spf_table(limit, path)
+        assert len(spf) == limit and len(np.load(path)) == limit, 'nope'
+        assert os.listdir(directory) == ['spf.npy'], 'nope'
+
+        #-- isprime and factorize answer from the table above the bitmap
+        for n in xrange(functions.SMALL_PRIME_LIMIT, limit):
+            assert functions.isprime(n) == brute_isprime(n), 'nope'
+            check_factorization(n, functions.factorize(n))
+        assert functions.factors(1048576) == \
+            set(2 ** i for i in xrange(21)), 'nope'
+
+        #-- in-memory tables write nothing
+        functions._SPF_TABLE = None
+        spf = functions.load_spf_table(100, None)
+        assert not isinstance(spf, np.memmap) and len(spf) == 100, 'nope'
+        assert functions.factorize(96) == {2: 5, 3: 1}, 'nope'
+    finally:
+        functions._SPF_TABLE = None
+        shutil.rmtree(directory)
+
+#-------------------------------------------------------------------------------
+
+def test_prime_segments():
+    expected = [n for n in xrange(200) if brute_isprime(n)]
+
+    #-- every start and stop, prime or not, odd or even, across segment sizes
+    #-- down to a single odd value per segment
+    for segment_size in [1, 2, 3, 7, 64]:
+        for start in xrange(0, 40):
+            for stop in range(start, 200, 13) + [start + 1, 199, 200]:
+                segments = list(functions.prime_segments(start, stop,
+                                                         segment_size))
+                assert all(len(segment) <= segment_size
+                           for segment in segments), 'nope'
+                assert functions.primes(start, stop, segment_size).tolist() \
+                    == [p for p in expected if start <= p < stop], 'nope'
+
+    for start, stop, primes in [(0, 3, [2]), (2, 3, [2]), (3, 4, [3]),
+                                (0, 4, [2, 3]), (1, 2, []), (3, 3, []),
+                                (5, 2, []), (-10, 6, [2, 3, 5])]:
+        assert functions.primes(start, stop, 1).tolist() == primes, 'nope'
+
+    #-- a range far from the origin, with stop on a prime
+    assert functions.primes(10 ** 9, 10 ** 9 + 9, 2).tolist() == \
+        [10 ** 9 + 7], 'nope'
+    assert functions.primes(10 ** 6 - 100, 1000003).tolist() == \
+        [n for n in xrange(10 ** 6 - 100, 1000003) if brute_isprime(n)], 'nope'
+
+#-------------------------------------------------------------------------------